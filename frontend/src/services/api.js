@@ -13,24 +13,58 @@ const api = axios.create({
   },
 });
 
+// Static copies of the catalog and insights, exported to /data at build time
+// (netlify/functions/static_export.py) and served straight from the CDN
+const STATIC_DATA_URL = '/data';
+let staticManifest = null;
+let staticDataEnabled = import.meta.env.PROD;
+
+const getStaticManifest = () => {
+  if (!staticManifest) {
+    staticManifest = axios.get(`${STATIC_DATA_URL}/manifest.json`).then((r) => r.data).catch(() => null);
+  }
+  return staticManifest;
+};
+
+// Read an exported file, or call the live API when there is no export or the file is missing
+const staticOrApi = async (path, fallback) => {
+  if (staticDataEnabled) {
+    const manifest = await getStaticManifest();
+    if (manifest) {
+      try {
+        return await axios.get(`${STATIC_DATA_URL}/${manifest.path}/${path}`);
+      } catch {
+        // Fall through to the API
+      }
+    }
+  }
+  return fallback();
+};
+
 // API endpoints mapping
 export const apiEndpoints = {
   // Universities
-  getUniversities: () => api.get('/universities/'),
-  getUniversity: (id) => api.get(`/universities/${id}`),
+  getUniversities: () => staticOrApi('universities.json', () => api.get('/universities/')),
+  getUniversity: (id) => staticOrApi(`universities/${id}.json`, () => api.get(`/universities/${id}`)),
+  compareUniversities: (ids) => api.get('/universities/compare', { params: { ids: ids.join(',') } }),
   
   // Insights
-  getRegionInsights: () => api.get('/insights/regions'),
-  getTypeInsights: () => api.get('/insights/types'),
-  getDifficultyInsights: () => api.get('/insights/difficulty'),
+  getRegionInsights: () => staticOrApi('insights/regions.json', () => api.get('/insights/regions')),
+  getTypeInsights: () => staticOrApi('insights/types.json', () => api.get('/insights/types')),
+  getDifficultyInsights: () => staticOrApi('insights/difficulty.json', () => api.get('/insights/difficulty')),
+  getInsightsSummary: () => staticOrApi('insights/summary.json', () => api.get('/insights/summary')),
   
   // Wizard
   getRecommendations: (preferences) => api.post('/wizard/recommendations', preferences),
   
   // Scraper
   updateData: () => api.post('/scrape/'),
+  getScrapeJob: (id) => api.get(`/scrape/jobs/${id}`),
 };
 
+const JOB_POLL_INTERVAL = 2000;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 // Helper functions for common operations
 export const universityService = {
   // Get all universities
@@ -55,6 +89,17 @@ export const universityService = {
     }
   },
 
+  // Compare up to 4 universities in one request
+  async fetchComparison(ids) {
+    try {
+      const response = await apiEndpoints.compareUniversities(ids);
+      return response.data;
+    } catch (error) {
+      console.error('Error comparing universities:', error);
+      throw error;
+    }
+  },
+
   // Get university recommendations
   async getRecommendations(preferences) {
     try {
@@ -66,11 +111,21 @@ export const universityService = {
     }
   },
 
-  // Update university data from external sources
+  // Update university data from external sources; the scrape runs as a
+  // background job, so poll it until it finishes
   async updateData() {
     try {
-      const response = await apiEndpoints.updateData();
-      return response.data;
+      let { data: job } = await apiEndpoints.updateData();
+      while (job.status === 'queued' || job.status === 'running') {
+        await sleep(JOB_POLL_INTERVAL);
+        ({ data: job } = await apiEndpoints.getScrapeJob(job.id));
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Scrape job failed');
+      }
+      // The exported copy predates this scrape until the site is rebuilt
+      staticDataEnabled = false;
+      return job.result;
     } catch (error) {
       console.error('Error updating data:', error);
       throw error;
@@ -82,17 +137,9 @@ export const insightsService = {
   // Get all insights data
   async fetchAllInsights() {
     try {
-      const [regions, types, difficulty] = await Promise.all([
-        apiEndpoints.getRegionInsights(),
-        apiEndpoints.getTypeInsights(),
-        apiEndpoints.getDifficultyInsights(),
-      ]);
-      
-      return {
-        regions: regions.data,
-        types: types.data,
-        difficulty: difficulty.data,
-      };
+      // One request returns every breakdown (plus fee and program stats)
+      const response = await apiEndpoints.getInsightsSummary();
+      return response.data;
     } catch (error) {
       console.error('Error fetching insights:', error);
       throw error;
@@ -1,4 +1,10 @@
 from main import app
 from mangum import Mangum
+import instrumentation
 
-handler = Mangum(app)
\ No newline at end of file
+adapter = Mangum(app)
+
+
+def handler(event, context):
+    # Times the Mangum translation too, and adds it to the Server-Timing header
+    return instrumentation.handle_lambda(adapter, event, context)
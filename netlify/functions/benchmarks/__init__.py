@@ -0,0 +1,13 @@
+# Benchmarks, run from netlify/functions as: python -m benchmarks.<name>
+import os
+import sys
+
+
+def require_database() -> None:
+    """
+    Exit unless NETLIFY_DATABASE_URL is set: the benchmarks would otherwise time
+    error responses from an empty universities_db.sqlite created in this directory.
+    """
+    if not os.getenv("NETLIFY_DATABASE_URL"):
+        sys.exit("Set NETLIFY_DATABASE_URL to a database with a catalog in it, for example one written by\n"
+                 "  python -m benchmarks.synthetic --programs 10000 --output /tmp/catalog.sqlite")
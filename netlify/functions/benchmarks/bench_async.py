@@ -0,0 +1,157 @@
+"""
+Load comparison of the async routes against the sync path they replaced.
+
+Two uvicorn servers are started on the same database: the app itself, whose
+/universities and /insights routes are async, and ``sync_app`` below, which
+serves the same endpoints with sync ``def`` routes on FastAPI's threadpool.
+Each is then hit with --concurrency requests in flight at a time.
+
+    python -m benchmarks.bench_async --concurrency 200 --requests 4000
+    CATALOG_CACHE=off python -m benchmarks.bench_async   # every request queries the database
+
+Point NETLIFY_DATABASE_URL at the database to test; the client and both
+servers share this machine's CPUs.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Response
+from sqlalchemy.orm import Session
+
+import catalog, crud, database, insights_store, schemas
+from benchmarks import require_database
+from routes.universities import _projection
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sync_app = FastAPI(title="Sekelafinder api (sync baseline)")
+
+
+@sync_app.get("/universities/", response_model=List[schemas.UniversityProjection], response_model_exclude_unset=True)
+def list_universities(response: Response, skip: int = 0, limit: int = 100,
+                      include: Optional[str] = None, fields: Optional[str] = None,
+                      region: Optional[str] = None, type: Optional[str] = None,
+                      max_fees: Optional[int] = None, difficulty: Optional[str] = None,
+                      academic_interest: Optional[str] = None, sort: str = "id",
+                      cursor: Optional[str] = None, db: Session = Depends(database.get_db)):
+    relations, keys = _projection(include, fields)
+    prefs = schemas.WizardPreferences(region=region, type=type, max_fees=max_fees,
+                                      difficulty=difficulty, academic_interest=academic_interest)
+    response.headers["ETag"] = f'"{catalog.current_version(db)}"'
+    snapshot = catalog.get_snapshot(db)
+    try:
+        get_page = snapshot.page if snapshot else functools.partial(crud.get_university_page, db)
+        universities, next_cursor = get_page(
+            skip=skip, limit=limit, include=relations, prefs=prefs, sort=sort, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [{key: getattr(uni, key) for key in keys} for uni in universities]
+
+
+@sync_app.get("/insights/summary")
+def insights_summary(response: Response, db: Session = Depends(database.get_db)):
+    response.headers["ETag"] = f'"{catalog.current_version(db)}"'
+    return insights_store.get_summary(db)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app: str, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        # Without a log line per request, unless REQUEST_LOG is set explicitly
+        cwd=FUNCTIONS_DIR, env={"REQUEST_LOG": "off", **os.environ},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{app} did not start")
+
+
+async def load(url: str, concurrency: int, requests: int):
+    """(requests/s, p50 ms, p99 ms, errors)"""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        # Warm-up, which also checks that the path answers before it is timed
+        for _ in range(min(concurrency, 20)):
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError as e:
+                sys.exit(f"GET {url} failed during warm-up: {type(e).__name__}: {e}")
+            if response.status_code != 200:
+                sys.exit(f"GET {url} answered HTTP {response.status_code} during warm-up, not 200\n"
+                         f"{response.text[:300]}")
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    return requests / elapsed, statistics.median(latencies) * 1000, p99 * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--path", action="append", help="Request path (repeatable)")
+    args = parser.parse_args()
+    paths = args.path or ["/universities/?limit=20", "/insights/summary"]
+    require_database()
+
+    for label, app in (("sync", "benchmarks.bench_async:sync_app"), ("async", "main:app")):
+        port = free_port()
+        server = serve(app, port)
+        try:
+            for path in paths:
+                rps, p50, p99, errors = asyncio.run(load(f"http://127.0.0.1:{port}{path}", args.concurrency, args.requests))
+                print(f"{label:<5} {path:<28} c={args.concurrency}  {rps:7.1f} req/s  "
+                      f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  errors {errors}")
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                # Requests still stuck waiting for a pooled connection
+                server.kill()
+
+
+if __name__ == "__main__":
+    main()
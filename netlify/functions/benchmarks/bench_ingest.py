@@ -0,0 +1,72 @@
+"""
+Compare the per-university ingestion path (routes.scrape.add_university) with
+ingest.bulk_load on a fresh SQLite database.
+
+    python -m benchmarks.bench_ingest --count 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database, ingest, search_index
+from routes import scrape
+
+
+def synthetic_records(count: int):
+    templates = scrape.scrape_tcu_universities()
+    for i in range(count):
+        record = dict(templates[i % len(templates)])
+        record["name"] = f"{record['name']} Campus {i}"
+        yield record
+
+
+def fresh_session(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=engine)
+    search_index.ensure_index(engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)()
+
+
+def run_add_university(path: str, records) -> float:
+    engine, db = fresh_session(path)
+    start = time.perf_counter()
+    for record in records:
+        scrape.add_university(db, record)
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+def run_bulk_load(path: str, records) -> float:
+    engine, db = fresh_session(path)
+    start = time.perf_counter()
+    report = ingest.bulk_load(db, records)
+    db.commit()
+    elapsed = time.perf_counter() - start
+    assert report.added == len(records), report.as_dict()
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.count))
+    programs = sum(len(r.get("programs", [])) for r in records)
+    print(f"{len(records)} universities, {programs} programs")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, run in (("add_university", run_add_university), ("bulk_load", run_bulk_load)):
+            elapsed = run(os.path.join(tmp, f"{label}.sqlite"), records)
+            print(f"{label:>15}: {elapsed:8.2f}s  ({len(records) / elapsed:,.0f} universities/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Cost of serving the catalog list: response_model validation + JSON (the path
+routes take for ORM rows) against the snapshot fast path (cached plain dicts
+encoded by orjson), and what gzip / brotli add on top.
+
+    python -m benchmarks.bench_serialization --sizes 30,300,3000,50000
+
+Each catalog is synthetic (three programs and two facilities per university)
+and served by a small app mounted with both routes, so framework overhead is
+the same on both sides.
+"""
+import argparse
+import time
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import catalog, compression, responses, schemas
+
+FIELDS = tuple(schemas.UniversityProjection.model_fields)
+
+
+def synthetic_snapshot(size: int) -> catalog.CatalogSnapshot:
+    regions = ("Dar es Salaam", "Arusha", "Dodoma", "Mwanza", "Morogoro", "Kilimanjaro")
+    universities = tuple(
+        schemas.University(
+            id=i, name=f"University {i} of {regions[i % 6]}", acronym=f"U{i}", region=regions[i % 6],
+            location=regions[i % 6], type="Public" if i % 3 else "Private", avg_fees=1_000_000 + (i % 40) * 50_000,
+            difficulty=("Low", "Medium", "High")[i % 3],
+            description="A university offering degree programmes in science, business and education.",
+            admission_requirements="Minimum Division III in Form VI with relevant subjects",
+            programs=[
+                schemas.Program(id=i * 3 + p, name=f"Bachelor of {subject}", duration=3 + p % 2,
+                                program_difficulty="Medium", prospects=f"{subject} careers")
+                for p, subject in enumerate(("Science", "Commerce", "Education"))
+            ],
+            facilities=[schemas.Facility(id=i * 2 + f, name=name) for f, name in enumerate(("Library", "Hostels"))],
+        )
+        for i in range(1, size + 1)
+    )
+    return catalog.CatalogSnapshot(1, universities, {u.id: u for u in universities})
+
+
+def make_app(snapshot: catalog.CatalogSnapshot) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[schemas.UniversityProjection], response_model_exclude_unset=True)
+    def validated():
+        return [{key: getattr(uni, key) for key in FIELDS} for uni in snapshot.universities]
+
+    @app.get("/fast", response_model=List[schemas.UniversityProjection])
+    def fast():
+        rows = (snapshot.as_dict(uni) for uni in snapshot.universities)
+        return responses.fast_json([{key: row[key] for key in FIELDS} for row in rows])
+
+    return app
+
+
+def timed(fn, repeats: int):
+    """(median seconds, last result)"""
+    times, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="30,300,3000,50000")
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'validated':>10} {'fast cold':>10} {'fast':>10} {'speedup':>8} {'JSON':>9} "
+          f"{'gzip':>16} {'brotli':>16}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        snapshot = synthetic_snapshot(size)
+        client = TestClient(make_app(snapshot))
+        repeats = max(3, min(50, 30_000 // size))
+        slow, expected = timed(lambda: client.get("/validated"), repeats)
+        # The first fast request also converts every university to a dict
+        cold, _ = timed(lambda: client.get("/fast"), 1)
+        fast, response = timed(lambda: client.get("/fast"), repeats)
+        assert response.json() == expected.json()
+
+        body = response.content
+        columns = []
+        for encoding in ("gzip", "br"):
+            elapsed, compressed = timed(lambda: compression.compress(body, encoding), max(3, repeats // 3))
+            columns.append(f"{len(compressed) / 1024:7.0f}K {elapsed * 1000:6.1f}ms")
+        print(f"{size:>6} {slow * 1000:8.1f}ms {cold * 1000:8.1f}ms {fast * 1000:8.1f}ms {slow / fast:7.1f}x "
+              f"{len(body) / 1024:8.0f}K {columns[0]:>16} {columns[1]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cold-start cost of the Netlify handler, eager vs lazy router loading.
+
+Every sample runs in a fresh interpreter, like a new Lambda container: it
+times ``import api`` and then the first (and a second, warm) invocation of
+the Mangum handler with an API Gateway event for --path.
+
+    python -m benchmarks.bench_startup --path /universities/ --runs 5
+
+Point NETLIFY_DATABASE_URL at a migrated database with data in it; a path
+that does not answer 200 stops the benchmark.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks import require_database
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+start = time.perf_counter()
+import api
+imported = time.perf_counter()
+path, query = sys.argv[1].partition("?")[::2]
+event = {
+    "resource": "/{proxy+}", "path": path, "httpMethod": "GET",
+    "headers": {"host": "localhost", "accept": "application/json"},
+    "multiValueHeaders": {},
+    "queryStringParameters": dict(p.split("=", 1) for p in query.split("&") if p) or None,
+    "multiValueQueryStringParameters": None,
+    "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": path,
+                       "identity": {"sourceIp": "127.0.0.1"}, "stage": "prod"},
+    "pathParameters": None, "stageVariables": None, "body": None, "isBase64Encoded": False,
+}
+response = api.handler(event, None)
+first = time.perf_counter()
+api.handler(event, None)
+second = time.perf_counter()
+print(json.dumps({"status": response["statusCode"], "body": response["body"][:300], "import": imported - start,
+                  "first": first - imported, "warm": second - first, "modules": len(sys.modules)}))
+"""
+
+
+def sample(path: str, lazy: bool) -> dict:
+    env = {"REQUEST_LOG": "off", **os.environ, "LAZY_ROUTERS": "1" if lazy else "0", "PYTHONDONTWRITEBYTECODE": ""}
+    out = subprocess.run([sys.executable, "-c", PROBE, path], cwd=FUNCTIONS_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    if result["status"] != 200:
+        sys.exit(f"GET {path} answered HTTP {result['status']}, not 200; timings of an error are not comparable.\n"
+                 f"{result['body']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", action="append", help="Request path (repeatable); default /universities/")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    require_database()
+
+    # One discarded run so both modes start with compiled bytecode on disk
+    sample("/universities/", lazy=False)
+    for path in args.path or ["/universities/"]:
+        for lazy in (False, True):
+            runs = [sample(path, lazy) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) * 1000 for key in ("import", "first", "warm")}
+            print(f"{path:<28} {'lazy ' if lazy else 'eager'}  "
+                  f"import {median['import']:6.1f} ms  first {median['first']:6.1f} ms  "
+                  f"cold total {median['import'] + median['first']:6.1f} ms  warm {median['warm']:5.1f} ms  "
+                  f"{runs[0]['modules']} modules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+The main API paths on synthetic catalogs of growing size, as a JSON report.
+
+For each --programs size a fresh SQLite catalog is generated with
+benchmarks.synthetic and loaded through ingest.bulk_load (the ingest path is
+timed, then ingest.merge re-applies the same records as an unchanged
+refresh). A child interpreter pointed at that database then runs every
+scenario through FastAPI's TestClient: --requests timed requests after one
+untimed first request, recording latency percentiles and the SQL statements
+each request executed.
+
+    python -m benchmarks.bench_suite --programs 1000,10000,100000 --output before.json
+    python -m benchmarks.bench_suite --programs 1000,10000,100000 --baseline before.json
+    CATALOG_CACHE=off python -m benchmarks.bench_suite   # every request queries the database
+
+Reports from the same machine and settings are comparable; --baseline prints
+each p50 and query count next to the earlier report's.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks import synthetic
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = (50, 90, 99)
+
+
+# (name, request builder); a builder takes (rng, university ids) and returns (method, path, json body)
+SCENARIOS = (
+    ("list", lambda rng, ids: ("GET", "/universities/?limit=100", None)),
+    ("list_filtered", lambda rng, ids: (
+        "GET", f"/universities/?region={rng.choice(synthetic.REGIONS)}&max_fees=3000000&sort=-avg_fees&limit=20", None)),
+    ("list_projection", lambda rng, ids: ("GET", "/universities/?fields=name,region,avg_fees&limit=100", None)),
+    ("detail", lambda rng, ids: ("GET", f"/universities/{rng.choice(ids)}", None)),
+    ("compare", lambda rng, ids: ("GET", f"/universities/compare?ids={','.join(map(str, rng.sample(ids, 4)))}", None)),
+    ("insights", lambda rng, ids: ("GET", "/insights/summary", None)),
+    ("wizard", lambda rng, ids: ("POST", "/wizard/recommendations", {
+        "region": rng.choice(synthetic.REGIONS), "type": rng.choice(("Public", "Private", "Any")),
+        "max_fees": rng.choice((None, 2_000_000, 4_000_000)), "difficulty": rng.choice(("Any", "Medium", "High")),
+        "academic_interest": rng.choice(("Computer Science", "STEM", "Health Sciences", "Law", None)),
+    })),
+)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted ``values``."""
+    return values[max(0, -(-p * len(values) // 100) - 1)]
+
+
+def run_scenarios(requests: int, seed: int) -> dict:
+    """Runs in the child interpreter, against NETLIFY_DATABASE_URL."""
+    import warnings
+    warnings.simplefilter("ignore")
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, text
+
+    import database, main
+
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count)
+    event.listen(database.async_engine().sync_engine, "before_cursor_execute", count)
+    with database.engine.connect() as conn:
+        ids = [row[0] for row in conn.execute(text("SELECT id FROM universities"))]
+
+    client = TestClient(main.app)
+    rng = random.Random(seed)
+    results = {}
+    for name, build in SCENARIOS:
+        method, path, body = build(rng, ids)
+        start = time.perf_counter()
+        client.request(method, path, json=body).raise_for_status()
+        first = time.perf_counter() - start
+
+        latencies, queries = [], 0
+        for _ in range(requests):
+            method, path, body = build(rng, ids)
+            statements[0] = 0
+            start = time.perf_counter()
+            client.request(method, path, json=body).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            queries += statements[0]
+        latencies.sort()
+        results[name] = {
+            "requests": requests,
+            "first_ms": round(first * 1000, 2),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+            **{f"p{p}_ms": round(percentile(latencies, p) * 1000, 2) for p in PERCENTILES},
+            "queries_per_request": round(queries / requests, 2),
+        }
+    return {"endpoints": results, "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)}
+
+
+def run_ingest(path: str, programs: int, seed: int) -> dict:
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    import ingest
+
+    report, elapsed, statements = synthetic.create_database(path, programs, seed)
+    result = {
+        "universities": report.added,
+        "bulk_load": {"seconds": round(elapsed, 3), "statements": statements},
+    }
+
+    engine = create_engine(f"sqlite:///{path}")
+    counted = []
+    event.listen(engine, "before_cursor_execute", lambda *args: counted.append(1))
+    db = sessionmaker(bind=engine, autoflush=False)()
+    data = list(synthetic.records(programs, seed))
+    start = time.perf_counter()
+    merged = ingest.merge(db, data)
+    db.commit()
+    assert not merged.changed, merged.as_dict()
+    result["merge_unchanged"] = {"seconds": round(time.perf_counter() - start, 3), "statements": len(counted)}
+    db.close()
+    engine.dispose()
+    return result
+
+
+def run_size(programs: int, requests: int, seed: int, tmp: str) -> dict:
+    path = os.path.join(tmp, f"catalog-{programs}.sqlite")
+    result = {"programs": programs, "ingest": run_ingest(path, programs, seed)}
+    result["universities"] = result["ingest"].pop("universities")
+    child = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_suite", "--scenarios-only", "--requests", str(requests),
+         "--seed", str(seed)],
+        # Without a log line per request, unless REQUEST_LOG is set explicitly
+        cwd=FUNCTIONS_DIR, env={"REQUEST_LOG": "off", **os.environ, "NETLIFY_DATABASE_URL": f"sqlite:///{path}"},
+        capture_output=True, text=True, check=True,
+    )
+    result.update(json.loads(child.stdout.splitlines()[-1]))
+    return result
+
+
+def print_results(report: dict, baseline: dict = None):
+    before = {r["programs"]: r for r in (baseline or {}).get("results", [])}
+    for result in report["results"]:
+        old = before.get(result["programs"])
+        ingest = result["ingest"]
+        print(f"\n{result['programs']} programs, {result['universities']} universities "
+              f"(bulk_load {ingest['bulk_load']['seconds']}s, unchanged merge {ingest['merge_unchanged']['seconds']}s, "
+              f"peak RSS {result['peak_rss_mb']} MB)")
+        print(f"  {'scenario':<16} {'p50':>9} {'p90':>9} {'p99':>9} {'first':>9} {'queries':>8}")
+        for name, stats in result["endpoints"].items():
+            line = (f"  {name:<16} {stats['p50_ms']:7.2f}ms {stats['p90_ms']:7.2f}ms {stats['p99_ms']:7.2f}ms "
+                    f"{stats['first_ms']:7.1f}ms {stats['queries_per_request']:8.2f}")
+            previous = old and old["endpoints"].get(name)
+            if previous:
+                line += (f"   baseline p50 {previous['p50_ms']:.2f}ms ({stats['p50_ms'] / previous['p50_ms']:.2f}x), "
+                         f"queries {previous['queries_per_request']:.2f}")
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--programs", default="1000,10000,100000", help="Catalog sizes, in programs")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="An earlier report to compare against")
+    parser.add_argument("--scenarios-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenarios_only:
+        print(json.dumps(run_scenarios(args.requests, args.seed)))
+        return
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "catalog_cache": os.getenv("CATALOG_CACHE", "on"),
+        "requests": args.requests,
+        "seed": args.seed,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for programs in (int(p) for p in args.programs.split(",")):
+            report["results"].append(run_size(programs, args.requests, args.seed, tmp))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
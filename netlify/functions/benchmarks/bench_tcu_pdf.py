@@ -0,0 +1,69 @@
+"""
+Time tcu_pdf on the bundled TCU list, and on the same list repeated --copies
+times to check that memory stays flat as the document grows.
+
+    python -m benchmarks.bench_tcu_pdf --copies 20 --workers 4
+
+Memory is the growth in this process's resident set while parsing (Linux
+only); page extraction in worker processes is not included.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypdf import PdfReader, PdfWriter
+
+import tcu_pdf
+
+
+def repeated_pdf(path: str, copies: int) -> str:
+    writer = PdfWriter()
+    for _ in range(copies):
+        writer.append(path)
+    fd, out = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        writer.write(f)
+    return out
+
+
+def rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def run(path: str, workers: int):
+    """(seconds, records, peak RSS growth in MiB)"""
+    baseline = peak = rss()
+    records = 0
+    start = time.perf_counter()
+    for _ in tcu_pdf.parse(path, workers):
+        records += 1
+        peak = max(peak, rss())
+    elapsed = time.perf_counter() - start
+    return elapsed, records, (peak - baseline) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=tcu_pdf.WORKERS)
+    args = parser.parse_args()
+
+    big = repeated_pdf(tcu_pdf.BUNDLED_PDF, args.copies)
+    try:
+        for label, path in (("bundled", tcu_pdf.BUNDLED_PDF), (f"x{args.copies}", big)):
+            pages = len(PdfReader(path).pages)
+            for workers in sorted({1, args.workers}):
+                elapsed, records, peak = run(path, workers)
+                print(f"{label:>8} {pages:5d} pages  workers={workers}  {elapsed:7.2f}s  "
+                      f"{records:6d} records  {pages / elapsed:7.1f} pages/s  RSS +{peak:5.1f} MiB")
+    finally:
+        os.remove(big)
+
+
+if __name__ == "__main__":
+    main()
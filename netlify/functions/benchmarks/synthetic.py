@@ -0,0 +1,135 @@
+"""
+Synthetic catalogs of any size, shaped like the scraper's records.
+
+records() yields dicts in the form ingest.bulk_load takes (and the scraper
+produces): university columns plus ``programs`` and ``facilities`` lists.
+Names are unique after dedup.name_key, values are spread over every region,
+type and difficulty the wizard filters on, and program names are drawn from
+the subjects the search index and interest matching look for. The same seed
+always gives the same catalog.
+
+    python -m benchmarks.synthetic --programs 100000 --output /tmp/catalog.sqlite
+
+writes a ready-to-use SQLite database; point NETLIFY_DATABASE_URL at it to
+run the API or the other benchmarks against a large catalog.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Iterator, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import database, ingest, search_index
+
+REGIONS = (
+    "Arusha", "Dar es Salaam", "Dodoma", "Geita", "Iringa", "Kagera", "Katavi", "Kigoma",
+    "Kilimanjaro", "Lindi", "Manyara", "Mara", "Mbeya", "Morogoro", "Mtwara", "Mwanza",
+    "Njombe", "Pwani", "Rukwa", "Ruvuma", "Shinyanga", "Simiyu", "Singida", "Songwe",
+    "Tabora", "Tanga", "Zanzibar",
+)
+KINDS = ("University", "University College", "Institute of Technology", "College of Health Sciences",
+         "Institute of Accountancy", "Catholic University")
+DIFFICULTIES = ("Low", "Medium", "High", "Very High")
+LEVELS = ("Bachelor of", "Bachelor of Science in", "Bachelor of Arts in", "Diploma in", "Master of")
+SUBJECTS = (
+    ("Computer Science", "Software Development, IT Consulting, Systems Analysis"),
+    ("Information Technology", "Network Administration, IT Support, Web Development"),
+    ("Civil Engineering", "Construction, Infrastructure Design, Project Management"),
+    ("Electrical Engineering", "Power Systems, Telecommunications, Renewable Energy"),
+    ("Medicine and Surgery", "Medical Practice, Research, Public Health"),
+    ("Nursing", "Clinical Nursing, Community Health, Midwifery"),
+    ("Pharmacy", "Community Pharmacy, Pharmaceutical Industry, Regulation"),
+    ("Law", "Legal Practice, Judiciary, Corporate Law"),
+    ("Business Administration", "Management, Entrepreneurship, Banking"),
+    ("Accounting and Finance", "Auditing, Taxation, Financial Analysis"),
+    ("Education", "Teaching, Curriculum Development, School Administration"),
+    ("Agriculture", "Agricultural Extension, Agribusiness, Research"),
+    ("Environmental Science", "Conservation, Environmental Consulting, Policy"),
+    ("Tourism and Hospitality", "Hotel Management, Tour Operations, Travel"),
+    ("Mass Communication", "Journalism, Broadcasting, Public Relations"),
+    ("Economics", "Policy Analysis, Banking, Research"),
+)
+FACILITIES = ("Library", "Computer Labs", "Hostels", "Sports Complex", "Medical Center", "Laboratories",
+              "Research Centers", "Cafeteria", "Wi-Fi Campus", "Lecture Theatres", "Research Farms")
+# Programs per university, and the mean of that range
+PROGRAMS_PER_UNIVERSITY = (1, 9)
+
+
+def records(programs: int, seed: int = 0) -> Iterator[dict]:
+    """Universities until ``programs`` programs have been produced (the last one may have fewer)."""
+    rng = random.Random(seed)
+    remaining, i = programs, 0
+    while remaining > 0:
+        i += 1
+        region = rng.choice(REGIONS)
+        public = rng.random() < 0.4
+        count = min(remaining, rng.randint(*PROGRAMS_PER_UNIVERSITY))
+        remaining -= count
+        subjects = rng.sample(SUBJECTS, min(count, len(SUBJECTS)))
+        yield {
+            "name": f"{region} {rng.choice(KINDS)} {i}",
+            "acronym": f"{region[:2].upper()}{i}",
+            "region": region,
+            "location": region,
+            "type": "Public" if public else "Private",
+            "avg_fees": rng.randrange(600_000 if public else 1_000_000, 3_000_000 if public else 6_000_000, 50_000),
+            "difficulty": rng.choices(DIFFICULTIES, weights=(2, 5, 3, 1))[0],
+            "description": f"A {'public' if public else 'private'} institution in {region} offering "
+                           f"{count} programmes, including {subjects[0][0].lower()}.",
+            "admission_requirements": rng.choice(("Minimum Division II in Form VI or equivalent",
+                                                  "Minimum Division III in Form VI with relevant subjects",
+                                                  "Diploma with GPA of 3.0 or above")),
+            "programs": [
+                {
+                    "name": f"{rng.choice(LEVELS)} {subjects[p % len(subjects)][0]}",
+                    "duration": rng.choice((2, 3, 3, 4, 5)),
+                    "program_difficulty": rng.choice(DIFFICULTIES),
+                    "prospects": subjects[p % len(subjects)][1],
+                }
+                for p in range(count)
+            ],
+            "facilities": rng.sample(FACILITIES, rng.randint(1, 6)),
+        }
+
+
+def create_database(path: str, programs: int, seed: int = 0) -> Tuple[ingest.IngestReport, float, int]:
+    """
+    Create a fresh SQLite catalog at ``path`` with ingest.bulk_load.
+    Returns (report, seconds spent loading, SQL statements executed while loading).
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=engine)
+    search_index.ensure_index(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    data = list(records(programs, seed))
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+    start = time.perf_counter()
+    report = ingest.bulk_load(db, data)
+    db.commit()
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    return report, elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--programs", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic_catalog.sqlite")
+    args = parser.parse_args()
+
+    report, elapsed, statements = create_database(args.output, args.programs, args.seed)
+    print(f"Wrote {report.added} universities with {args.programs} programs to {args.output} "
+          f"in {elapsed:.1f}s ({statements} statements)")
+
+
+if __name__ == "__main__":
+    main()
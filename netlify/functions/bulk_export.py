@@ -0,0 +1,70 @@
+"""
+Streaming bulk export of the catalog for GET /universities/export.
+
+Rows are read through crud.iter_universities (a server-side cursor with
+``yield_per``) and encoded as they arrive, in chunks of about CHUNK_SIZE
+bytes, so the response starts at once and memory does not grow with the
+catalog. The generator opens its own session: it keeps reading after the
+route has returned, when the request's session may already be closed.
+
+    ndjson  one University object per line, programs and facilities nested
+    csv     one row per program (a university without programs gets one row
+            with empty program columns); facilities joined with "; "
+"""
+import csv
+import io
+from typing import Iterator, Optional
+
+import catalog, crud, database, responses, schemas
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 500
+UNIVERSITY_COLUMNS = ("id",) + tuple(schemas.UniversityBase.model_fields)
+PROGRAM_COLUMNS = ("id",) + tuple(schemas.ProgramBase.model_fields)
+CSV_HEADER = (UNIVERSITY_COLUMNS
+              + tuple(name if name.startswith("program_") else f"program_{name}" for name in PROGRAM_COLUMNS)
+              + ("facilities",))
+
+
+def _ndjson(uni) -> bytes:
+    return responses.dumps(catalog.to_schema(uni).model_dump()) + b"\n"
+
+
+def _csv_rows(uni):
+    columns = [getattr(uni, name) for name in UNIVERSITY_COLUMNS]
+    facilities = "; ".join(f.name for f in uni.facilities if f.name)
+    if not uni.programs:
+        return [columns + [None] * len(PROGRAM_COLUMNS) + [facilities]]
+    return [columns + [getattr(p, name) for name in PROGRAM_COLUMNS] + [facilities] for p in uni.programs]
+
+
+def stream(format: str, prefs: Optional[schemas.WizardPreferences] = None,
+           batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """Encoded export chunks; ``format`` is a key of FORMATS."""
+    db = database.SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        chunk = bytearray()
+        if format == "csv":
+            writer.writerow(CSV_HEADER)
+        for uni in crud.iter_universities(db, prefs, batch_size):
+            if format == "csv":
+                writer.writerows(_csv_rows(uni))
+                chunk += buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk += _ndjson(uni)
+            if len(chunk) >= CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        chunk += buffer.getvalue().encode()
+        if chunk:
+            yield bytes(chunk)
+    finally:
+        db.close()
@@ -0,0 +1,200 @@
+"""
+In-process snapshot of the university catalog.
+
+The catalog is small and only changes when the scraper runs, so read endpoints
+serve it from memory. Each snapshot is tagged with the version stored in the
+``catalog_meta`` table; the scrape routes bump that version, and other warm
+containers notice the change with a single-row query instead of reloading.
+Set CATALOG_CACHE=off to always query the database instead.
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import crud, models, schemas
+
+CACHE_ENABLED = os.getenv("CATALOG_CACHE", "on").lower() not in ("0", "off", "false")
+# Seconds a warm container trusts its snapshot before re-checking the version row
+CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "2"))
+
+_lock = threading.Lock()
+# Serializes snapshot loads in async routes, which run on the event loop thread
+# where waiting on _lock across a query would block every other request
+_async_lock: Optional[asyncio.Lock] = None
+_snapshot: Optional["CatalogSnapshot"] = None
+_checked_at = 0.0
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """An immutable view of every university with its programs and facilities."""
+    version: int
+    universities: Tuple[schemas.University, ...]
+    by_id: Mapping[int, schemas.University]
+    # Sort orders and plain-dict copies are derived lazily, once per snapshot
+    _orders: Dict[str, Tuple[list, list]] = field(default_factory=dict, repr=False, compare=False)
+    _dicts: Dict[int, dict] = field(default_factory=dict, repr=False, compare=False)
+
+    def get(self, uni_id: int) -> Optional[schemas.University]:
+        return self.by_id.get(uni_id)
+
+    def as_dict(self, uni: schemas.University) -> dict:
+        """``uni`` as plain data for responses.fast_json; treat it as read-only."""
+        data = self._dicts.get(uni.id)
+        if data is None:
+            data = self._dicts[uni.id] = uni.model_dump()
+        return data
+
+    def filter(self, prefs: Optional[schemas.WizardPreferences]) -> List[schemas.University]:
+        return [u for u in self.universities if matches(u, prefs)]
+
+    def _ordered(self, key: str) -> Tuple[list, list]:
+        if key not in self._orders:
+            rows = sorted(((crud.sort_value(u, key), u.id), u) for u in self.universities)
+            self._orders[key] = ([k for k, _ in rows], [u for _, u in rows])
+        return self._orders[key]
+
+    def page(self, skip: int = 0, limit: int = 100,
+             prefs: Optional[schemas.WizardPreferences] = None,
+             sort: str = "id", cursor: Optional[str] = None, **_):
+        """Same contract as crud.get_university_page, served from memory."""
+        key, descending = crud.parse_sort(sort)
+        keys, ordered = self._ordered(key)
+        if descending:
+            end = bisect_left(keys, crud.decode_cursor(cursor, sort)) if cursor else len(ordered)
+            candidates = reversed(ordered[:end])
+        else:
+            start = bisect_right(keys, crud.decode_cursor(cursor, sort)) if cursor else 0
+            candidates = iter(ordered[start:])
+
+        rows = (u for u in candidates if matches(u, prefs))
+        if skip and not cursor:
+            rows = islice(rows, skip, None)
+        universities = list(islice(rows, limit + 1))
+        if len(universities) <= limit:
+            return universities, None
+        universities = universities[:limit]
+        return universities, crud.encode_cursor(universities[-1], sort)
+
+
+def matches(uni, prefs: Optional[schemas.WizardPreferences]) -> bool:
+    """Python twin of crud.filter_universities."""
+    if prefs is None:
+        return True
+    if prefs.region and prefs.region != 'Any' and uni.region != prefs.region:
+        return False
+    if prefs.type and prefs.type != 'Any' and uni.type != prefs.type:
+        return False
+    if prefs.max_fees and (uni.avg_fees is None or uni.avg_fees > prefs.max_fees):
+        return False
+    if prefs.difficulty and prefs.difficulty != 'Any' and uni.difficulty != prefs.difficulty:
+        return False
+    if prefs.academic_interest and prefs.academic_interest != 'Any':
+        interest_lower = prefs.academic_interest.lower()
+        if not any(interest_lower in (p.name or "").lower() for p in uni.programs):
+            return False
+    return True
+
+
+def get_version(db: Session) -> int:
+    meta = db.query(models.CatalogMeta.version).filter(models.CatalogMeta.id == 1).first()
+    return meta.version if meta else 0
+
+
+def bump_version(db: Session) -> int:
+    """Mark the catalog as changed. Call after the scraper has committed its writes."""
+    global _snapshot
+    updated = db.execute(
+        update(models.CatalogMeta).where(models.CatalogMeta.id == 1)
+        .values(version=models.CatalogMeta.version + 1)
+    ).rowcount
+    if not updated:
+        db.add(models.CatalogMeta(id=1, version=1))
+    db.commit()
+    with _lock:
+        _snapshot = None
+    return get_version(db)
+
+
+def _columns(obj, schema) -> dict:
+    return {name: getattr(obj, name) for name in schema.model_fields if name not in ("programs", "facilities")}
+
+
+def to_schema(uni: models.University) -> schemas.University:
+    return schemas.University(
+        **_columns(uni, schemas.University),
+        programs=[schemas.Program(**_columns(p, schemas.Program)) for p in uni.programs],
+        facilities=[schemas.Facility(**_columns(f, schemas.Facility)) for f in uni.facilities],
+    )
+
+
+def load_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    rows = crud.with_relations(db.query(models.University)).order_by(models.University.id).all()
+    universities = tuple(to_schema(u) for u in rows)
+    return CatalogSnapshot(version, universities, {u.id: u for u in universities})
+
+
+def get_snapshot(db: Session) -> Optional[CatalogSnapshot]:
+    """Return the current snapshot, reloading it only when the catalog version moved."""
+    global _snapshot, _checked_at
+    if not CACHE_ENABLED:
+        return None
+    if _snapshot is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return _snapshot
+
+    version = get_version(db)
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_snapshot(db, version)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def current_version(db: Session) -> int:
+    """The catalog version, without loading a snapshot just to read it."""
+    snapshot = _snapshot
+    if CACHE_ENABLED and snapshot is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return snapshot.version
+    return get_version(db)
+
+
+def _fresh() -> Optional[CatalogSnapshot]:
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return snapshot
+    return None
+
+
+async def get_snapshot_async(db) -> Optional[CatalogSnapshot]:
+    """get_snapshot for an AsyncSession."""
+    global _snapshot, _checked_at, _async_lock
+    if not CACHE_ENABLED:
+        return None
+    snapshot = _fresh()
+    if snapshot is not None:
+        return snapshot
+
+    version = await db.run_sync(get_version)
+    if _async_lock is None:
+        _async_lock = asyncio.Lock()
+    async with _async_lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.version != version:
+            snapshot = await db.run_sync(load_snapshot, version)
+        with _lock:
+            _snapshot, _checked_at = snapshot, time.monotonic()
+        return snapshot
+
+
+async def current_version_async(db) -> int:
+    """current_version for an AsyncSession."""
+    snapshot = _fresh() if CACHE_ENABLED else None
+    return snapshot.version if snapshot is not None else await db.run_sync(get_version)
@@ -0,0 +1,93 @@
+"""
+Side-by-side comparison of a few universities.
+
+Programs are grouped into broad fields by keywords in their names, so the
+comparison page can show one row per field with each university's programs
+in its own column. Fee deltas are computed against the cheapest university
+and against the first one requested (the one the student started from).
+"""
+from typing import List, Optional, Sequence
+
+MAX_UNIVERSITIES = 4
+
+# Checked in order, so "Bachelor of Science in Computer Science" lands in
+# Engineering & Technology before the generic "science" keyword is reached
+PROGRAM_CATEGORIES = (
+    ("Health", ("medicine", "nursing", "pharmacy", "health", "dental", "clinical", "laboratory")),
+    ("Engineering & Technology", ("engineering", "technology", "computer", "architecture", "information", "ict", "mining")),
+    ("Agriculture & Environment", ("agricultur", "veterinary", "forestry", "environment", "wildlife", "fisheries")),
+    ("Business & Economics", ("business", "commerce", "accounting", "finance", "economics", "procurement",
+                              "marketing", "administration", "cooperative")),
+    ("Law", ("law",)),
+    ("Education", ("education",)),
+    ("Science", ("science", "math", "physics", "chemistry", "biology", "statistics")),
+    ("Humanities & Social Sciences", ("arts", "social", "development", "communication", "theology", "islamic",
+                                      "history", "language", "tourism", "studies")),
+)
+OTHER_CATEGORY = "Other"
+
+
+def program_category(name: Optional[str]) -> str:
+    name = (name or "").lower()
+    for category, keywords in PROGRAM_CATEGORIES:
+        if any(keyword in name for keyword in keywords):
+            return category
+    return OTHER_CATEGORY
+
+
+def _delta(fees: Optional[int], baseline: Optional[int]) -> Optional[int]:
+    return None if fees is None or baseline is None else fees - baseline
+
+
+def compare(universities: Sequence[dict]) -> dict:
+    """
+    The schemas.Comparison payload for universities given as plain dicts
+    (CatalogSnapshot.as_dict or University.model_dump()), in the order requested.
+    """
+    order = [category for category, _ in PROGRAM_CATEGORIES] + [OTHER_CATEGORY]
+    columns = {category: [[] for _ in universities] for category in order}
+    for column, uni in enumerate(universities):
+        for program in uni["programs"]:
+            columns[program_category(program["name"])][column].append(program["name"])
+
+    fees = [uni["avg_fees"] for uni in universities]
+    known = [f for f in fees if f is not None]
+    lowest = min(known) if known else None
+    first = fees[0] if fees else None
+    return {
+        "universities": list(universities),
+        "program_categories": [
+            {"category": category, "programs": columns[category]}
+            for category in order if any(columns[category])
+        ],
+        "fees": [
+            {
+                "university_id": uni["id"],
+                "avg_fees": uni["avg_fees"],
+                "delta_from_lowest": _delta(uni["avg_fees"], lowest),
+                "delta_from_first": _delta(uni["avg_fees"], first),
+            }
+            for uni in universities
+        ],
+        "lowest_fees": lowest,
+    }
+
+
+def parse_ids(value: str) -> List[int]:
+    """``?ids=3,1,7`` as distinct ids in the given order; ValueError if malformed or too many."""
+    ids: List[int] = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            uni_id = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid university id '{part}'")
+        if uni_id not in ids:
+            ids.append(uni_id)
+    if not ids:
+        raise ValueError("Pass at least one university id")
+    if len(ids) > MAX_UNIVERSITIES:
+        raise ValueError(f"At most {MAX_UNIVERSITIES} universities can be compared")
+    return ids
@@ -0,0 +1,144 @@
+"""
+Brotli / gzip compression for API responses.
+
+The middleware picks brotli when the client accepts it (and the ``brotli``
+package is installed), gzip otherwise, and leaves small bodies, already
+encoded responses and non-text content types alone. Streamed responses are
+compressed chunk by chunk and flushed after each one, so clients still
+receive rows as they are produced. A compressed body is a different
+representation, so a strong ETag is weakened; http_cache compares ETags
+weakly, so revalidation keeps working.
+"""
+import os
+import zlib
+from typing import Optional
+
+import instrumentation
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MINIMUM_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# Fast settings for dynamic responses; brotli 4 beats gzip 6 on both size and time for catalog JSON
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._brotli = None
+            # wbits=31: gzip container
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        with instrumentation.timed("compress"):
+            if self._brotli is not None:
+                out = self._brotli.process(data)
+                return out + (self._brotli.finish() if final else self._brotli.flush())
+            out = self._zlib.compress(data)
+            return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return _Compressor(encoding).compress(data, final=True)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = accepted_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                # First body message: decide now that the size (or streaming) is known
+                response_start, start = start, None
+                if not self._should_compress(response_start, body, more_body):
+                    await send(response_start)
+                    await send(message)
+                    compressor = False
+                    return
+                compressor = _Compressor(encoding)
+                body = compressor.compress(body, final=not more_body)
+                await send(self._compressed_start(response_start, encoding, None if more_body else len(body)))
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+            if compressor:
+                body = compressor.compress(body, final=not more_body)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start, body: bytes, more_body: bool) -> bool:
+        headers = {k.lower(): v for k, v in start.get("headers", [])}
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        return (
+            start["status"] not in (204, 304)
+            and b"content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and (more_body or len(body) >= self.minimum_size)
+        )
+
+    @staticmethod
+    def _compressed_start(start, encoding: str, length: Optional[int]):
+        headers = []
+        vary = None
+        for key, value in start.get("headers", []):
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**start, "headers": headers}
@@ -1,16 +1,31 @@
-from sqlalchemy.orm import Session
+import base64
+import json
+import math
+from sqlalchemy import and_, case, func, literal_column, or_
+from sqlalchemy.orm import Session, selectinload, noload
 import models, schemas
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-def get_universities(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.University).offset(skip).limit(limit).all()
+UNIVERSITY_RELATIONS = ("programs", "facilities")
 
-def get_university(db: Session, uni_id: int):
-    return db.query(models.University).filter(models.University.id == uni_id).first()
+# Sort keys usable for keyset pagination; each is paired with the id as a tie-breaker.
+SORT_KEYS = {
+    "id": models.University.id,
+    "name": models.University.name,
+    # Rendered with an inline 0 so it matches the ix_universities_fees_sort expression;
+    # a bound parameter would hide the match from SQLite's planner
+    "avg_fees": func.coalesce(models.University.avg_fees, literal_column("0")),
+}
 
-def get_recommendations(db: Session, prefs: schemas.WizardPreferences) -> List[models.University]:
-    query = db.query(models.University)
-    
+def with_relations(query, include: Iterable[str] = UNIVERSITY_RELATIONS):
+    # selectinload fetches each collection for the whole page in one extra query;
+    # noload leaves skipped collections empty instead of lazy loading them per row.
+    for name in UNIVERSITY_RELATIONS:
+        attr = getattr(models.University, name)
+        query = query.options(selectinload(attr) if name in include else noload(attr))
+    return query
+
+def filter_universities(query, prefs: schemas.WizardPreferences):
     if prefs.region and prefs.region != 'Any':
         query = query.filter(models.University.region == prefs.region)
     if prefs.type and prefs.type != 'Any':
@@ -20,15 +35,203 @@ def get_recommendations(db: Session, prefs: schemas.WizardPreferences) -> List[m
     if prefs.difficulty and prefs.difficulty != 'Any':
         query = query.filter(models.University.difficulty == prefs.difficulty)
     if prefs.academic_interest and prefs.academic_interest != 'Any':
-        interest_lower = prefs.academic_interest.lower()
-        query = query.join(models.Program).filter(
-            models.Program.name.ilike(f"%{interest_lower}%")
-        )
-    
-    universities = query.all()
+        # EXISTS instead of a join so multi-program matches don't duplicate rows;
+        # autoescape makes % and _ literal, like the substring test in catalog.matches
+        query = query.filter(models.University.programs.any(
+            models.Program.name.icontains(prefs.academic_interest, autoescape=True)
+        ))
+    return query
+
+def sort_value(uni: models.University, sort: str):
+    return (uni.avg_fees or 0) if sort == "avg_fees" else getattr(uni, sort)
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split ``name`` / ``-avg_fees`` into (key, descending)."""
+    key = sort.lstrip("-")
+    if key not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by '{key}', expected one of: {', '.join(SORT_KEYS)}")
+    return key, sort.startswith("-")
+
+def encode_cursor(uni: models.University, sort: str) -> str:
+    key, _ = parse_sort(sort)
+    # The sort travels with the position, so a cursor is never compared against another key
+    raw = json.dumps([sort, sort_value(uni, key), uni.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value) -> bool:
+    return (_is_int(value) or isinstance(value, float)) and math.isfinite(value)
+
+# What a cursor's value must be for each sort key, so it compares against the column
+# (and the snapshot's sort keys) instead of failing deep inside a query or a bisect
+CURSOR_VALUES = {
+    "id": _is_int,
+    "name": lambda value: isinstance(value, str),
+    "avg_fees": lambda value: value is None or _is_number(value),
+}
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, int]:
+    try:
+        cursor_sort, value, uni_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor is for sort '{cursor_sort}', not '{sort}'")
+    key, _ = parse_sort(sort)
+    if not CURSOR_VALUES[key](value) or not _is_int(uni_id):
+        raise ValueError("Invalid cursor")
+    # Missing fees sort as 0, as in SORT_KEYS and sort_value
+    return (value or 0) if key == "avg_fees" else value, uni_id
+
+def universities_query(db: Session, skip: int = 0, limit: int = 100,
+                       include: Iterable[str] = UNIVERSITY_RELATIONS,
+                       prefs: Optional[schemas.WizardPreferences] = None,
+                       sort: str = "id", cursor: Optional[str] = None):
+    """The query behind get_universities, for EXPLAIN checks."""
+    key, descending = parse_sort(sort)
+    column, id_column = SORT_KEYS[key], models.University.id
+    query = with_relations(db.query(models.University), include)
+    if prefs is not None:
+        query = filter_universities(query, prefs)
+
+    if cursor:
+        # Keyset: continue strictly after the (sort value, id) of the previous page's
+        # last row, so deep pages use the index instead of scanning skipped rows. The
+        # redundant bound lets SQLite seek into the index; it cannot derive a range
+        # from the OR alone when the values are bound parameters.
+        value, last_id = decode_cursor(cursor, sort)
+        if descending:
+            query = query.filter(column <= value, or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            query = query.filter(column >= value, or_(column > value, and_(column == value, id_column > last_id)))
+
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column, id_column)
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def get_universities(db: Session, **kwargs):
+    return universities_query(db, **kwargs).all()
+
+def get_university_page(db: Session, limit: int = 100, **kwargs) -> Tuple[List[models.University], Optional[str]]:
+    """Like get_universities, but also return the cursor for the following page."""
+    universities = get_universities(db, limit=limit + 1, **kwargs)
+    if len(universities) <= limit:
+        return universities, None
+    universities = universities[:limit]
+    return universities, encode_cursor(universities[-1], kwargs.get("sort", "id"))
+
+def count_universities(db: Session, prefs: Optional[schemas.WizardPreferences] = None) -> int:
+    query = db.query(models.University)
+    if prefs is not None:
+        query = filter_universities(query, prefs)
+    return query.count()
+
+def iter_universities(db: Session, prefs: Optional[schemas.WizardPreferences] = None,
+                      batch_size: int = 500) -> Iterator[models.University]:
+    """
+    Every matching university in id order, with programs and facilities, read through a
+    server-side cursor ``batch_size`` rows at a time. Each batch loads its collections with
+    one query per relation; nothing holds on to earlier batches, so memory stays flat.
+    """
+    query = with_relations(db.query(models.University))
+    if prefs is not None:
+        query = filter_universities(query, prefs)
+    return iter(query.order_by(models.University.id).yield_per(batch_size))
+
+def get_university(db: Session, uni_id: int):
+    query = with_relations(db.query(models.University))
+    return query.filter(models.University.id == uni_id).first()
+
+def get_universities_by_ids(db: Session, ids: Sequence[int]) -> List[models.University]:
+    """The universities with these ids, in the order given, with programs and facilities loaded
+    (three queries however many ids)."""
+    found = {uni.id: uni for uni in with_relations(db.query(models.University))
+             .filter(models.University.id.in_(ids)).all()}
+    return [found[uni_id] for uni_id in ids if uni_id in found]
+
+def get_recommendations(db: Session, prefs: schemas.WizardPreferences) -> List[models.University]:
+    query = filter_universities(with_relations(db.query(models.University)), prefs)
     
+    return sort_by_difficulty(query.all())
+
+def sort_by_difficulty(universities: list) -> list:
     # Sort by difficulty order
     order = ['Low', 'Medium', 'High', 'Very High']
     universities.sort(key=lambda u: order.index(u.difficulty) if u.difficulty in order else 0)
     
     return universities
+
+
+# Upper bounds (exclusive) of the fee histogram buckets, in TZS
+FEE_BUCKETS = (500_000, 1_000_000, 1_500_000, 2_000_000, 3_000_000, 5_000_000)
+FEE_PERCENTILES = (10, 25, 50, 75, 90)
+
+def count_by(db: Session, column) -> Dict[Optional[str], int]:
+    rows = db.query(column, func.count(models.University.id)).group_by(column).all()
+    return {key: count for key, count in rows}
+
+def fee_histogram(db: Session, buckets: Sequence[int] = FEE_BUCKETS) -> List[dict]:
+    fees = models.University.avg_fees
+    bucket = case(*[(fees < edge, i) for i, edge in enumerate(buckets)], else_=len(buckets))
+    counts = dict(
+        db.query(bucket, func.count(models.University.id))
+        .filter(fees.isnot(None)).group_by(bucket).all()
+    )
+    edges = (0,) + tuple(buckets) + (None,)
+    return [
+        {"min": edges[i], "max": edges[i + 1], "count": counts.get(i, 0)}
+        for i in range(len(buckets) + 1)
+    ]
+
+def fee_percentiles(db: Session, percentiles: Sequence[int] = FEE_PERCENTILES) -> Dict[str, Optional[int]]:
+    """Nearest-rank percentiles of avg_fees, using a window function (works on SQLite and Postgres)."""
+    fees = models.University.avg_fees
+    total = db.query(func.count(fees)).scalar() or 0
+    if not total:
+        return {f"p{p}": None for p in percentiles}
+    ranks = {p: max(1, -(-p * total // 100)) for p in percentiles}
+    ranked = (
+        db.query(fees.label("fees"), func.row_number().over(order_by=fees).label("rank"))
+        .filter(fees.isnot(None)).subquery()
+    )
+    values = dict(
+        db.query(ranked.c.rank, ranked.c.fees).filter(ranked.c.rank.in_(set(ranks.values()))).all()
+    )
+    return {f"p{p}": values.get(rank) for p, rank in ranks.items()}
+
+def fee_stats(db: Session) -> dict:
+    fees = models.University.avg_fees
+    count, total, low, high = db.query(func.count(fees), func.sum(fees), func.min(fees), func.max(fees)).one()
+    return {
+        "count": count,
+        "sum": total or 0,
+        "min": low,
+        "max": high,
+        "mean": round(total / count) if count else None,
+        "percentiles": fee_percentiles(db),
+        "histogram": fee_histogram(db),
+    }
+
+def programs_per_region(db: Session) -> Dict[Optional[str], int]:
+    rows = (
+        db.query(models.University.region, func.count(models.Program.id))
+        .join(models.Program, models.Program.university_id == models.University.id)
+        .group_by(models.University.region).all()
+    )
+    return {region: count for region, count in rows}
+
+def insights_summary(db: Session) -> dict:
+    return {
+        "total": db.query(func.count(models.University.id)).scalar(),
+        "regions": count_by(db, models.University.region),
+        "types": count_by(db, models.University.type),
+        "difficulty": count_by(db, models.University.difficulty),
+        "fees": fee_stats(db),
+        "programs_per_region": programs_per_region(db),
+    }
@@ -1,7 +1,12 @@
+import functools
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import instrumentation
 
 # Get the database URL from environment variables provided by Netlify
 DATABASE_URL = os.getenv("NETLIFY_DATABASE_URL")
@@ -9,18 +14,146 @@ DATABASE_URL = os.getenv("NETLIFY_DATABASE_URL")
 # The 'postgres' dialect is not supported by SQLAlchemy, it must be 'postgresql'
 if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+# Use the driver requirements.txt installs; SQLAlchemy 2.1 maps plain postgresql:// to psycopg 3
+if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
 
 # Fallback to a local SQLite database if the environment variable is not set
 if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./universities_db.sqlite"
 
-engine = create_engine(DATABASE_URL)
+PROFILES = ("serverless", "server", "sqlite")
+# Bytes of the SQLite file to memory-map
+SQLITE_MMAP_SIZE = int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 2**20)))
+
+
+def default_profile(url: str) -> str:
+    if make_url(url).get_backend_name() == "sqlite":
+        return "sqlite"
+    return "serverless" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "server"
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def engine_options(url: str, profile: str) -> dict:
+    """
+    create_engine arguments for a profile:
+
+    serverless: every Lambda container holds its own pool, so each keeps at
+        most one connection (DB_POOL_SIZE), checked with a ping before use
+        because a frozen container's connection may have been dropped while it
+        was idle. One overflow connection (DB_MAX_OVERFLOW), closed again when
+        returned, lets a scrape job record its progress while its own session
+        holds the pooled one. DB_POOL_SIZE=0 opens a connection per session instead, for
+        when an external pooler (PgBouncer, a Neon "-pooler" host) sits in
+        front of Postgres; that is the default for such hosts.
+    server: a long-running process, with a sized pool shared by its threads.
+    sqlite: a single local file, tuned with pragmas on connect.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}', expected one of: {', '.join(PROFILES)}")
+    if profile == "sqlite":
+        return {}
+    if profile == "serverless":
+        pooled_host = "-pooler" in (make_url(url).host or "")
+        size = _env_int("DB_POOL_SIZE", 0 if pooled_host else 1)
+        if size == 0:
+            return {"poolclass": NullPool}
+        return {"pool_size": size, "max_overflow": _env_int("DB_MAX_OVERFLOW", 1), "pool_pre_ping": True,
+                "pool_recycle": _env_int("DB_POOL_RECYCLE", 300)}
+    return {"pool_size": _env_int("DB_POOL_SIZE", 5), "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+            "pool_pre_ping": True, "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+            "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30)}
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers keep reading while a refresh writes; NORMAL only syncs at checkpoints in WAL mode
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # Wait for a writer to finish instead of failing with "database is locked"
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = None):
+    profile = profile or os.getenv("DB_PROFILE") or default_profile(url)
+    engine = create_engine(url, **engine_options(url, profile))
+    if profile == "sqlite":
+        event.listen(engine, "connect", _tune_sqlite)
+    instrumentation.instrument_engine(engine)
+    return engine
+
+
+def async_url(url: str) -> URL:
+    """The same database through its asyncio driver: aiosqlite or asyncpg."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        # asyncpg takes ssl= instead of libpq's sslmode= and has no channel_binding
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    raise ValueError(f"No asyncio driver for {backend} databases")
+
+
+def make_async_engine(url: str = DATABASE_URL, profile: str = None):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    profile = profile or os.getenv("DB_PROFILE") or default_profile(url)
+    options = engine_options(url, profile)
+    target = async_url(url)
+    if options.get("poolclass") is NullPool and target.get_backend_name() == "postgresql":
+        # A pooler in transaction mode hands each statement to any server
+        # connection, so asyncpg must not rely on prepared statements
+        options["connect_args"] = {"statement_cache_size": 0}
+        target = target.update_query_dict({"prepared_statement_cache_size": "0"})
+    engine = create_async_engine(target, **options)
+    if profile == "sqlite":
+        event.listen(engine.sync_engine, "connect", _tune_sqlite)
+    instrumentation.instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+# Created on first use, so processes without async routes (manage.py, jobs,
+# migrations) never import the asyncio drivers
+@functools.lru_cache(maxsize=None)
+def async_engine():
+    return make_async_engine()
+
+
+@functools.lru_cache(maxsize=None)
+def _async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # Objects stay readable after commit; async sessions cannot lazy-load expired attributes
+    return async_sessionmaker(async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def AsyncSessionLocal():
+    return _async_sessionmaker()()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """get_db for async routes; run the sync crud/catalog helpers with ``await db.run_sync(fn, ...)``."""
+    async with AsyncSessionLocal() as db:
+        yield db
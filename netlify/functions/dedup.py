@@ -0,0 +1,116 @@
+"""
+Name matching for scraped institutions.
+
+Every university stores ``normalized_name``, a canonical form of its name
+(case, accents, punctuation, common abbreviations and filler words removed)
+with a unique constraint on it. A scrape run loads a NameIndex once and then
+matches each record with dictionary lookups: the normalized name first, then
+a unique acronym, then token-set similarity against the few universities that
+share one of the record's two rarest name tokens.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+
+ABBREVIATIONS = {
+    "univ": "university",
+    "uni": "university",
+    "inst": "institute",
+    "coll": "college",
+    "tech": "technology",
+    "sci": "science",
+    "st": "saint",
+    "&": "and",
+}
+STOPWORDS = frozenset({"of", "the", "in", "at", "for", "and"})
+# Jaccard similarity of the name tokens needed to treat two names as the same institution
+SIMILARITY_THRESHOLD = 0.85
+# Looser threshold when the acronyms already agree
+ACRONYM_SIMILARITY_THRESHOLD = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|&")
+
+
+def _tokens(name: Optional[str]) -> List[str]:
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    words = (ABBREVIATIONS.get(word, word) for word in _TOKEN_RE.findall(text))
+    return [word for word in words if word not in STOPWORDS]
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    """The value stored in University.normalized_name."""
+    return " ".join(_tokens(name)) or None
+
+
+def acronym_key(acronym: Optional[str]) -> Optional[str]:
+    return "".join(ch for ch in (acronym or "").lower() if ch.isalnum()) or None
+
+
+def token_set(name: Optional[str]) -> FrozenSet[str]:
+    return frozenset(_tokens(name))
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NameIndex:
+    """In-memory lookup of existing universities by normalized name, acronym and token."""
+
+    def __init__(self):
+        self.by_key: Dict[str, int] = {}
+        self.by_acronym: Dict[str, Set[int]] = defaultdict(set)
+        self.by_token: Dict[str, Set[int]] = defaultdict(set)
+        self.tokens: Dict[int, FrozenSet[str]] = {}
+
+    @classmethod
+    def load(cls, db: Session) -> "NameIndex":
+        index = cls()
+        for uni_id, name, acronym in db.execute(
+            select(models.University.id, models.University.name, models.University.acronym)
+        ):
+            index.add(uni_id, name, acronym)
+        return index
+
+    def add(self, uni_id: int, name: str, acronym: Optional[str] = None) -> None:
+        key = name_key(name)
+        if key:
+            self.by_key.setdefault(key, uni_id)
+        if acronym_key(acronym):
+            self.by_acronym[acronym_key(acronym)].add(uni_id)
+        tokens = token_set(name)
+        self.tokens[uni_id] = tokens
+        for token in tokens:
+            self.by_token[token].add(uni_id)
+
+    def _best(self, tokens: FrozenSet[str], candidates: Iterable[int], threshold: float) -> Optional[int]:
+        scored = [(similarity(tokens, self.tokens[c]), c) for c in candidates]
+        score, best = max(scored, default=(0.0, None))
+        return best if score >= threshold else None
+
+    def match(self, name: str, acronym: Optional[str] = None) -> Optional[int]:
+        """The id of the existing university this name (and acronym) refers to, if any."""
+        key = name_key(name)
+        if key in self.by_key:
+            return self.by_key[key]
+        tokens = token_set(name)
+        same_acronym = self.by_acronym.get(acronym_key(acronym), ())
+        if len(same_acronym) == 1:
+            found = self._best(tokens, same_acronym, ACRONYM_SIMILARITY_THRESHOLD)
+            if found is not None:
+                return found
+        # A name missing both of this name's two rarest tokens cannot reach the
+        # threshold (for names under fourteen tokens), so only those postings are scored
+        rarest = sorted((t for t in tokens if t in self.by_token), key=lambda t: len(self.by_token[t]))[:2]
+        candidates = set().union(*(self.by_token[t] for t in rarest))
+        return self._best(tokens, candidates, SIMILARITY_THRESHOLD)
+
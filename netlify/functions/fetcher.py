@@ -0,0 +1,121 @@
+"""
+Concurrent fetching of scraper sources.
+
+Every source is requested at the same time, with at most PER_HOST_LIMIT
+requests in flight per host. Response bodies are kept in an on-disk cache
+together with their ETag / Last-Modified validators, so the next fetch sends
+a conditional GET and an unchanged page comes back as a 304 instead of being
+downloaded again. When a source is unreachable the last cached copy is served
+and the error is reported alongside it.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sekelafinder-http-cache"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPE_PER_HOST_LIMIT", "2"))
+TIMEOUT = 15.0
+USER_AGENT = "SekelaFinder scraper (+https://sekelafinder.netlify.app)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int] = None
+    content: Optional[bytes] = None
+    from_cache: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.content is not None
+
+    @property
+    def text(self) -> str:
+        return (self.content or b"").decode("utf-8", errors="replace")
+
+
+class DiskCache:
+    """Response bodies and their validators, one pair of files per URL."""
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + suffix)
+
+    def load(self, url: str):
+        """(validators, body) for a cached URL, or (None, None)."""
+        try:
+            with open(self._path(url, ".json")) as f:
+                meta = json.load(f)
+            with open(self._path(url, ".body"), "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def store(self, url: str, response: httpx.Response) -> None:
+        meta = {"url": url, "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified")}
+        if not meta["etag"] and not meta["last_modified"]:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Body first, then the metadata that makes it visible; both written atomically
+        for suffix, data in ((".body", response.content), (".json", json.dumps(meta).encode())):
+            fd, tmp = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(url, suffix))
+
+
+async def _fetch(client: httpx.AsyncClient, url: str, cache: Optional[DiskCache],
+                 limit: asyncio.Semaphore) -> FetchResult:
+    meta, cached = cache.load(url) if cache else (None, None)
+    headers = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    async with limit:
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+            return FetchResult(url, content=cached, from_cache=cached is not None, error=error)
+
+    if response.status_code == 304 and cached is not None:
+        return FetchResult(url, 304, cached, from_cache=True)
+    if response.is_error:
+        error = f"HTTP {response.status_code}"
+        return FetchResult(url, response.status_code, cached, from_cache=cached is not None, error=error)
+    if cache:
+        cache.store(url, response)
+    return FetchResult(url, response.status_code, response.content)
+
+
+async def fetch_all(urls: Iterable[str], cache: Optional[DiskCache] = None,
+                    per_host: int = PER_HOST_LIMIT, timeout: float = TIMEOUT) -> Dict[str, FetchResult]:
+    """Fetch every URL concurrently. Failures are returned as results, never raised."""
+    urls = list(dict.fromkeys(urls))
+    limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        results = await asyncio.gather(*(
+            _fetch(client, url, cache, limits[urlsplit(url).netloc]) for url in urls
+        ))
+    return dict(zip(urls, results))
+
+
+def fetch_all_sync(urls: Iterable[str], cache: Optional[DiskCache] = None, **kwargs) -> Dict[str, FetchResult]:
+    """fetch_all for synchronous callers such as the scrape routes."""
+    return asyncio.run(fetch_all(urls, DiskCache() if cache is None else cache, **kwargs))
@@ -0,0 +1,61 @@
+"""
+HTTP validators and cache headers for the read-only catalog endpoints.
+
+Every response from these routers is a pure function of the catalog version
+(plus the deployed code), so the ETag is derived from that version and a
+matching If-None-Match is answered with 304 before any payload is built.
+"""
+import inspect
+import os
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+import catalog
+
+# Browsers revalidate after a minute; the Netlify edge keeps serving a stale copy
+# while it revalidates in the background.
+CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+CDN_CACHE_CONTROL = os.getenv(
+    "API_CDN_CACHE_CONTROL", "public, s-maxage=300, stale-while-revalidate=86400, durable"
+)
+# Changes on every deploy so a new response shape never matches an old ETag
+DEPLOY_ID = os.getenv("DEPLOY_ID") or os.getenv("COMMIT_REF") or "local"
+
+
+def make_etag(version: int) -> str:
+    return f'"catalog-{version}-{DEPLOY_ID[:12]}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def _validate(request: Request, response: Response, version: int) -> None:
+    headers = {
+        "ETag": make_etag(version),
+        "Cache-Control": CACHE_CONTROL,
+        "Netlify-CDN-Cache-Control": CDN_CACHE_CONTROL,
+        "Netlify-Vary": "query",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(headers["ETag"], if_none_match):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def conditional_get(get_db):
+    """
+    Build a router dependency that sets validators and short-circuits with 304.
+    An async ``get_db`` (database.get_async_db) gives an async dependency.
+    """
+    if inspect.isasyncgenfunction(get_db):
+        async def check_async(request: Request, response: Response, db=Depends(get_db)):
+            _validate(request, response, await catalog.current_version_async(db))
+        return check_async
+
+    def check(request: Request, response: Response, db: Session = Depends(get_db)):
+        _validate(request, response, catalog.current_version(db))
+    return check
@@ -0,0 +1,304 @@
+"""
+Bulk ingestion of scraped university records.
+
+Unlike routes.scrape.add_university, which commits once per university and
+again for its programs and facilities, bulk_load validates every record up
+front and inserts universities, programs and facilities with batched
+executemany statements inside the caller's transaction. A bad record is
+reported and skipped instead of aborting the batch.
+
+merge reconciles the catalog with a fresh scrape instead: records are matched
+by normalized name (see dedup.name_key), and a content hash stored on each university means only new, changed
+and vanished records are written. Unchanged universities keep their ids.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import dedup, insights_store, models, search_index
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class IngestError:
+    index: int
+    name: Optional[str]
+    error: str
+
+
+@dataclass
+class IngestReport:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    ids: List[int] = field(default_factory=list)
+    errors: List[IngestError] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def as_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "failed": len(self.errors),
+            "errors": [e.__dict__ for e in self.errors],
+        }
+
+
+@dataclass
+class _Row:
+    index: int
+    university: dict
+    programs: List[dict]
+    facilities: List[dict]
+    id: Optional[int] = None
+
+
+def _as_int(value, name: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def _as_float(value, name: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def content_hash(record: dict) -> str:
+    """Stable hash of a normalized record, including its programs and facilities."""
+    data = {k: v for k, v in record.items() if k not in ("content_hash", "normalized_name")}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def normalize(uni_data: dict) -> dict:
+    """
+    Validate a scraped record and apply the same defaults as add_university.
+    Returns the university columns, including content_hash, plus "programs"
+    and "facilities" lists.
+    """
+    if not isinstance(uni_data, dict):
+        raise ValueError("record must be an object")
+    name = (uni_data.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+
+    programs = []
+    for p in uni_data.get("programs") or []:
+        if not isinstance(p, dict) or not (p.get("name") or "").strip():
+            raise ValueError("every program needs a name")
+        programs.append({
+            "name": p["name"].strip(),
+            "duration": _as_float(p.get("duration", 3), "program duration"),
+            "program_difficulty": p.get("program_difficulty", "Medium"),
+            "prospects": p.get("prospects", ""),
+        })
+
+    record = {
+        "name": name,
+        "acronym": uni_data.get("acronym"),
+        "region": uni_data.get("region"),
+        "location": uni_data.get("location"),
+        "type": uni_data.get("type"),
+        "avg_fees": _as_int(uni_data.get("avg_fees"), "avg_fees"),
+        "difficulty": uni_data.get("difficulty", "Medium"),
+        "description": uni_data.get("description", ""),
+        "admission_requirements": uni_data.get("admission_requirements", ""),
+        "programs": programs,
+        "facilities": [{"name": str(f)} for f in uni_data.get("facilities") or [] if f],
+    }
+    record["content_hash"] = content_hash(record)
+    record["normalized_name"] = dedup.name_key(name)
+    return record
+
+
+def _insert(db: Session, rows: List[_Row]) -> None:
+    ids = db.execute(
+        insert(models.University).returning(models.University.id, sort_by_parameter_order=True),
+        [row.university for row in rows],
+    ).scalars().all()
+    programs = [dict(p, university_id=uni_id) for row, uni_id in zip(rows, ids) for p in row.programs]
+    facilities = [dict(f, university_id=uni_id) for row, uni_id in zip(rows, ids) for f in row.facilities]
+    if programs:
+        db.execute(insert(models.Program), programs)
+    if facilities:
+        db.execute(insert(models.Facility), facilities)
+    for row, uni_id in zip(rows, ids):
+        row.id = uni_id
+
+
+def _insert_batch(db: Session, rows: List[_Row], report: IngestReport) -> List[_Row]:
+    """Insert one batch under a savepoint and return the rows that made it in."""
+    try:
+        with db.begin_nested():
+            _insert(db, rows)
+        inserted = rows
+    except SQLAlchemyError:
+        # Something in the batch was rejected by the database: retry row by row
+        # so only the offending records are dropped.
+        inserted = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    _insert(db, [row])
+                inserted.append(row)
+            except SQLAlchemyError as e:
+                report.errors.append(
+                    IngestError(row.index, row.university["name"], str(getattr(e, "orig", None) or e))
+                )
+    report.added += len(inserted)
+    report.ids.extend(row.id for row in inserted)
+    return inserted
+
+
+def _rows(records: Iterable[dict], report: IngestReport) -> Iterator[_Row]:
+    """Normalized rows for the valid records; invalid ones go to the report."""
+    for index, uni_data in enumerate(records):
+        try:
+            uni = normalize(uni_data)
+        except ValueError as e:
+            name = uni_data.get("name") if isinstance(uni_data, dict) else None
+            report.errors.append(IngestError(index, name, str(e)))
+            continue
+        programs, facilities = uni.pop("programs"), uni.pop("facilities")
+        yield _Row(index, uni, programs, facilities)
+
+
+def _insert_all(db: Session, rows: Iterable[_Row], report: IngestReport, batch_size: int) -> List[_Row]:
+    loaded: List[_Row] = []
+    batch: List[_Row] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            loaded.extend(_insert_batch(db, batch, report))
+            batch = []
+    if batch:
+        loaded.extend(_insert_batch(db, batch, report))
+    return loaded
+
+
+def _index(db: Session, rows: Iterable[_Row]) -> None:
+    # Index from the validated rows rather than reading everything back
+    search_index.index_universities(db, (
+        (SimpleNamespace(id=row.id, **row.university), [SimpleNamespace(**p) for p in row.programs])
+        for row in rows
+    ))
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _delete_children(db: Session, ids: List[int], batch_size: int) -> None:
+    for chunk in _chunks(ids, batch_size):
+        db.execute(delete(models.Program).where(models.Program.university_id.in_(chunk)))
+        db.execute(delete(models.Facility).where(models.Facility.university_id.in_(chunk)))
+
+
+def bulk_load(db: Session, records: Iterable[dict], batch_size: int = BATCH_SIZE,
+              update_derived: bool = True) -> IngestReport:
+    """
+    Insert every valid record inside the caller's transaction; the caller commits.
+    With ``update_derived`` the search index and stored insights are refreshed too.
+    """
+    report = IngestReport()
+    loaded = _insert_all(db, _rows(records, report), report, batch_size)
+    if update_derived:
+        _index(db, loaded)
+        insights_store.rebuild(db)
+    return report
+
+
+def merge(db: Session, records: Iterable[dict], batch_size: int = BATCH_SIZE,
+          update_derived: bool = True) -> IngestReport:
+    """
+    Make the catalog match ``records``, matching universities as dedup does: new
+    records are inserted, records whose content hash changed are updated in
+    place (keeping their id), and universities missing from ``records`` are
+    deleted. The caller commits.
+    """
+    report = IngestReport()
+    names = dedup.NameIndex.load(db)
+    digests = dict(db.execute(select(models.University.id, models.University.content_hash)).all())
+
+    claimed = set()
+    new_rows: List[_Row] = []
+    changed_rows: List[_Row] = []
+
+    def claim(row: _Row, uni_id: Optional[int]) -> None:
+        uni = row.university
+        if uni_id in claimed:
+            report.errors.append(IngestError(row.index, uni["name"], "duplicate name in scraped data"))
+        elif uni_id is None or uni_id < 0:
+            new_rows.append(row)
+            # Not inserted yet, so it gets a placeholder id
+            claimed.add(-len(new_rows))
+            names.add(-len(new_rows), uni["name"], uni["acronym"])
+        else:
+            claimed.add(uni_id)
+            names.add(uni_id, uni["name"], uni["acronym"])
+            row.id = uni_id
+            if digests[uni_id] == uni["content_hash"]:
+                report.unchanged += 1
+            else:
+                changed_rows.append(row)
+
+    # Exact normalized names claim their university first, so a variant spelling
+    # elsewhere in the scrape cannot take it over
+    fuzzy = []
+    for row in _rows(records, report):
+        uni_id = names.by_key.get(row.university["normalized_name"])
+        if uni_id is None:
+            fuzzy.append(row)
+        else:
+            claim(row, uni_id)
+    for row in fuzzy:
+        claim(row, names.match(row.university["name"], row.university["acronym"]))
+
+    removed_ids = [uni_id for uni_id in digests if uni_id not in claimed]
+    if removed_ids:
+        _delete_children(db, removed_ids, batch_size)
+        for chunk in _chunks(removed_ids, batch_size):
+            db.execute(delete(models.University).where(models.University.id.in_(chunk)))
+        report.removed = len(removed_ids)
+
+    if changed_rows:
+        # Programs and facilities have no natural key, so a changed university's
+        # children are replaced wholesale while the university row is updated in place
+        _delete_children(db, [row.id for row in changed_rows], batch_size)
+        for chunk in _chunks(changed_rows, batch_size):
+            db.execute(update(models.University), [dict(row.university, id=row.id) for row in chunk])
+            programs = [dict(p, university_id=row.id) for row in chunk for p in row.programs]
+            facilities = [dict(f, university_id=row.id) for row in chunk for f in row.facilities]
+            if programs:
+                db.execute(insert(models.Program), programs)
+            if facilities:
+                db.execute(insert(models.Facility), facilities)
+        report.updated = len(changed_rows)
+        report.ids.extend(row.id for row in changed_rows)
+
+    loaded = _insert_all(db, new_rows, report, batch_size)
+
+    if update_derived and report.changed:
+        search_index.remove_universities(db, removed_ids)
+        _index(db, changed_rows + loaded)
+        insights_store.rebuild(db)
+    return report
@@ -0,0 +1,45 @@
+"""
+Precomputed insights, stored as one JSON row in the ``insights`` table.
+
+The scraper is the only writer of the catalog, so it keeps this row current:
+ingest.bulk_load and ingest.merge rebuild it from the GROUP BY queries in crud
+once per run, and the one-at-a-time add_university drops it so the next read
+rebuilds it. The /insights endpoints then read a single row. Run
+``python manage.py rebuild-insights`` to recover it.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import crud, models
+
+
+def _save(db: Session, summary: dict) -> dict:
+    row = db.get(models.InsightsSnapshot, 1)
+    if row is None:
+        row = models.InsightsSnapshot(id=1)
+        db.add(row)
+    row.payload = json.dumps(summary)
+    row.updated_at = datetime.utcnow()
+    return summary
+
+
+def rebuild(db: Session) -> dict:
+    """Recompute every insight from the catalog tables. The caller commits."""
+    summary = json.loads(json.dumps(crud.insights_summary(db)))
+    return _save(db, summary)
+
+
+def invalidate(db: Session) -> None:
+    """Drop the stored insights; the next get_summary rebuilds them. The caller commits."""
+    db.query(models.InsightsSnapshot).filter(models.InsightsSnapshot.id == 1).delete()
+
+
+def get_summary(db: Session) -> dict:
+    row = db.get(models.InsightsSnapshot, 1)
+    if row is not None:
+        return json.loads(row.payload)
+    summary = rebuild(db)
+    db.commit()
+    return summary
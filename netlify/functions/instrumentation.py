@@ -0,0 +1,246 @@
+"""
+Per-request timings: Server-Timing headers, structured logs and /metrics.
+
+RequestTimingMiddleware starts a RequestStats for each request and keeps it
+in a context variable, so the pieces that do the work can add to it:
+
+    db          SQL time and statement count, from cursor events on every
+                engine database.py creates (instrument_engine)
+    serialize   JSON encoding in responses.FastJSONResponse
+    compress    brotli / gzip in compression.CompressionMiddleware
+    app         everything until the response headers, including the above
+    adapter     Mangum's event translation around the app (api.handler only)
+
+The totals so far are sent as a Server-Timing header, so they show up in the
+browser's network panel. Once the body has been sent, one JSON line is
+printed for the request, and the values are added to Prometheus histograms
+that GET /metrics renders. Every process (each Lambda container on Netlify)
+keeps its own histograms.
+
+Routes answering with FastAPI's own response_model serialization have that
+time in ``app``; it is not reported separately.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+REQUEST_LOG = os.getenv("REQUEST_LOG", "on").lower() not in ("0", "off", "false")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "on").lower() not in ("0", "off", "false")
+# When set, GET /metrics requires "Authorization: Bearer <token>". On Netlify
+# (AWS Lambda) it must be set: without it /metrics answers 404 there.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_REQUIRE_TOKEN = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+METRICS_PATH = "/metrics"
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestStats:
+    start: float = field(default_factory=time.perf_counter)
+    method: str = ""
+    path: str = ""
+    route: str = ""
+    status: int = 0
+    db: float = 0.0
+    queries: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Seconds until the response headers, and until the last body message
+    app: Optional[float] = None
+    total: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        noun = "query" if self.queries == 1 else "queries"
+        parts = [f'db;dur={self.db * 1000:.1f};desc="{self.queries} {noun}"']
+        parts += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items()]
+        if self.app is not None:
+            parts.append(f"app;dur={self.app * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+class timed:
+    """``with instrumentation.timed("serialize"):`` adds the block's duration to the current request."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stats = _current.get()
+        if stats is not None:
+            stats.add(self.name, time.perf_counter() - self.start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = conn.info.pop("query_start", None)
+    if stats is not None and start is not None:
+        stats.db += time.perf_counter() - start
+        stats.queries += 1
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and time spent in the database for the request that runs them."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str]):
+        self.name, self.help, self.buckets, self.labels = name, help, tuple(buckets), tuple(labels)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, values: Tuple[str, ...], amount: float) -> None:
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if amount <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self.series.items()):
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.labels, values))
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+LABELS = ("method", "route", "status")
+REQUEST_SECONDS = Histogram("http_request_duration_seconds",
+                            "Time from the request to the last byte of the response.", SECONDS_BUCKETS, LABELS)
+DB_SECONDS = Histogram("http_request_db_seconds", "Time spent executing SQL per request.", SECONDS_BUCKETS, LABELS)
+QUERIES = Histogram("http_request_queries", "SQL statements executed per request.", QUERY_BUCKETS, LABELS)
+SERIALIZE_SECONDS = Histogram("http_request_serialize_seconds",
+                              "Time spent encoding JSON per request (orjson fast path).", SECONDS_BUCKETS, LABELS)
+ADAPTER_SECONDS = Histogram("lambda_adapter_seconds",
+                            "Time Mangum spends translating a Lambda event and response.", SECONDS_BUCKETS, LABELS)
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, QUERIES, SERIALIZE_SECONDS, ADAPTER_SECONDS)
+_metrics_lock = threading.Lock()
+
+
+def finish(stats: RequestStats) -> None:
+    """Record a completed request in the histograms and the request log."""
+    labels = (stats.method, stats.route, str(stats.status))
+    with _metrics_lock:
+        REQUEST_SECONDS.observe(labels, stats.total or 0.0)
+        DB_SECONDS.observe(labels, stats.db)
+        QUERIES.observe(labels, stats.queries)
+        SERIALIZE_SECONDS.observe(labels, stats.timings.get("serialize", 0.0))
+        if "adapter" in stats.timings:
+            ADAPTER_SECONDS.observe(labels, stats.timings["adapter"])
+    if REQUEST_LOG:
+        print(json.dumps({
+            "event": "request",
+            "method": stats.method,
+            "route": stats.route,
+            "path": stats.path,
+            "status": stats.status,
+            "duration_ms": round((stats.total or 0.0) * 1000, 2),
+            "app_ms": round((stats.app or 0.0) * 1000, 2),
+            "db_ms": round(stats.db * 1000, 2),
+            "queries": stats.queries,
+            **{f"{name}_ms": round(seconds * 1000, 2) for name, seconds in stats.timings.items()},
+        }))
+
+
+def render_metrics() -> str:
+    with _metrics_lock:
+        return "\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        # api.handler may already have started the stats, to add Mangum's share
+        stats = _current.get()
+        owner = stats is None
+        if owner:
+            stats = RequestStats()
+            _current.set(stats)
+        stats.method, stats.path = scope["method"], scope["path"]
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                stats.status = message["status"]
+                stats.app = time.perf_counter() - stats.start
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        except Exception:
+            stats.status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            # The route template, not the path, so ids do not each get their own series
+            stats.route = getattr(route, "path", None) or "unmatched"
+            stats.total = time.perf_counter() - stats.start
+            if owner:
+                finish(stats)
+
+
+def handle_lambda(adapter, event, context):
+    """
+    Call the Mangum ``adapter`` with timings for the whole invocation; the
+    time outside the app is reported as ``adapter`` in Server-Timing.
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        result = adapter(event, context)
+    finally:
+        _current.reset(token)
+    elapsed = time.perf_counter() - stats.start
+    if stats.total is None:
+        # Not an HTTP request the app saw (e.g. a warm-up event)
+        return result
+    stats.add("adapter", max(0.0, elapsed - stats.total))
+    stats.total = elapsed
+    if SERVER_TIMING:
+        for key in ("headers", "multiValueHeaders"):
+            headers = result.get(key) or {}
+            for name, value in headers.items():
+                if name.lower() == "server-timing":
+                    extra = f"adapter;dur={stats.timings['adapter'] * 1000:.1f}"
+                    headers[name] = [*value, extra] if isinstance(value, list) else f"{value}, {extra}"
+    finish(stats)
+    return result
@@ -0,0 +1,210 @@
+"""
+Background jobs for the scrape and refresh endpoints.
+
+Starting a job inserts a row in ``scrape_jobs`` and returns straight away; the
+work runs on a small thread pool and records its stage, progress and counts on
+that row, which GET /scrape/jobs/{id} reads. Only one job may write the catalog
+at a time: a second request for the same kind of job attaches to the running
+one, and a request for a different kind is refused with JobConflict.
+
+AWS Lambda (and so Netlify Functions) freezes the process once the response is
+sent and stops it at the function timeout, so there the job is handed to the
+scrape-background function instead: Netlify answers that invocation with 202
+at once and lets it run for up to 15 minutes. Setting SCRAPE_JOB_WORKERS
+explicitly overrides this; SCRAPE_JOB_WORKERS=0 runs the job inline, inside
+the request that started it. Whichever way it runs, a job only starts once:
+the runner claims the queued row before doing any work.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Mapping, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import database, models, schemas
+
+ACTIVE_KEY = "catalog"
+WORKERS = int(os.getenv("SCRAPE_JOB_WORKERS", "1"))
+# Hand jobs to the background function: the default on Lambda, unless SCRAPE_JOB_WORKERS is set
+BACKGROUND = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME")) and "SCRAPE_JOB_WORKERS" not in os.environ
+BACKGROUND_PATH = "/.netlify/functions/scrape-background"
+# Where to invoke it; by default BACKGROUND_PATH on the host that received the request
+BACKGROUND_URL = os.getenv("SCRAPE_BACKGROUND_URL")
+# A running job that has not reported progress for this long is assumed dead
+STALE_AFTER = timedelta(seconds=float(os.getenv("SCRAPE_JOB_STALE_AFTER", "900")))
+
+# run(db, progress) -> result dict; progress(stage, fraction, **counts)
+Progress = Callable[..., None]
+JobFunction = Callable[[Session, Progress], dict]
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class JobConflict(Exception):
+    """Another kind of job is already writing the catalog."""
+
+    def __init__(self, job: schemas.ScrapeJob):
+        super().__init__(f"A {job.kind} job ({job.id}) is already {job.status}")
+        self.job = job
+
+
+def to_schema(job: models.ScrapeJob, attached: bool = False) -> schemas.ScrapeJob:
+    return schemas.ScrapeJob(
+        id=job.id, kind=job.kind, status=job.status, stage=job.stage, progress=job.progress,
+        counts=json.loads(job.counts or "{}"),
+        result=json.loads(job.result) if job.result else None,
+        error=job.error, created_at=job.created_at, started_at=job.started_at,
+        updated_at=job.updated_at, finished_at=job.finished_at, attached=attached,
+    )
+
+
+def get(db: Session, job_id: int) -> Optional[schemas.ScrapeJob]:
+    job = db.get(models.ScrapeJob, job_id)
+    return to_schema(job) if job else None
+
+
+def _expire_stale(db: Session) -> None:
+    cutoff = datetime.utcnow() - STALE_AFTER
+    stale = db.query(models.ScrapeJob).filter(
+        models.ScrapeJob.active_key.isnot(None), models.ScrapeJob.updated_at < cutoff
+    ).all()
+    for job in stale:
+        job.status, job.error, job.active_key = "failed", "Job stopped reporting progress", None
+        job.finished_at = datetime.utcnow()
+    if stale:
+        db.commit()
+
+
+def _update(job_id: int, **fields) -> None:
+    db = database.SessionLocal()
+    try:
+        job = db.get(models.ScrapeJob, job_id)
+        counts = fields.pop("counts", None)
+        if counts:
+            job.counts = json.dumps({**json.loads(job.counts or "{}"), **counts})
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim(job_id: int) -> bool:
+    """Move a queued job to running; False if it was already claimed (or does not exist)."""
+    db = database.SessionLocal()
+    try:
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(models.ScrapeJob)
+            .where(models.ScrapeJob.id == job_id, models.ScrapeJob.status == "queued")
+            .values(status="running", stage="starting", started_at=now, updated_at=now)
+        ).rowcount
+        db.commit()
+        return bool(claimed)
+    finally:
+        db.close()
+
+
+def _execute(job_id: int, run: JobFunction) -> None:
+    def progress(stage: str, fraction: float, **counts):
+        print(f"Job {job_id}: {stage} ({fraction:.0%})")
+        _update(job_id, stage=stage, progress=fraction, counts=counts)
+
+    if not _claim(job_id):
+        print(f"Job {job_id} is not queued, skipping")
+        return
+    db = database.SessionLocal()
+    try:
+        result = run(db, progress)
+    except Exception as e:
+        db.rollback()
+        print(f"Job {job_id} failed: {e}")
+        _update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow(), active_key=None)
+    else:
+        _update(job_id, status="succeeded", stage="done", progress=1.0, result=json.dumps(result),
+                counts=result.get("changes"), finished_at=datetime.utcnow(), active_key=None)
+    finally:
+        db.close()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(WORKERS, thread_name_prefix="scrape-job")
+        return _executor
+
+
+def _dispatch(job_id: int, base_url: Optional[str]) -> None:
+    """Invoke the background function for a queued job; the job fails if it cannot be reached."""
+    import httpx
+
+    url = BACKGROUND_URL or (base_url or "").rstrip("/") + BACKGROUND_PATH
+    try:
+        httpx.post(url, json={"job_id": job_id}, timeout=10).raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"Job {job_id}: could not start the background function at {url}: {e}")
+        _update(job_id, status="failed", error=f"Could not start the background function: {e}",
+                finished_at=datetime.utcnow(), active_key=None)
+
+
+def run_queued(job_id: int, runners: Mapping[str, JobFunction]) -> None:
+    """Run a job queued by start(), looking up its function by kind (the background function's entry point)."""
+    db = database.SessionLocal()
+    try:
+        job = db.get(models.ScrapeJob, job_id)
+        kind = job.kind if job else None
+    finally:
+        db.close()
+    if kind not in runners:
+        print(f"Job {job_id}: no runner for {kind or 'a missing job'}")
+        return
+    _execute(job_id, runners[kind])
+
+
+def start(kind: str, run: JobFunction, base_url: Optional[str] = None) -> schemas.ScrapeJob:
+    """
+    Queue ``run`` as a job of ``kind``. If a job of the same kind is already
+    active, that job is returned instead, with attached=True. ``base_url`` is
+    where this request arrived, used to reach the background function.
+    """
+    db = database.SessionLocal()
+    try:
+        _expire_stale(db)
+        now = datetime.utcnow()
+        job = models.ScrapeJob(kind=kind, status="queued", stage="queued", progress=0,
+                               active_key=ACTIVE_KEY, created_at=now, updated_at=now)
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            active = db.query(models.ScrapeJob).filter(models.ScrapeJob.active_key == ACTIVE_KEY).first()
+            if active is None:
+                # It finished in the meantime
+                return start(kind, run, base_url)
+            if active.kind != kind:
+                raise JobConflict(to_schema(active))
+            return to_schema(active, attached=True)
+        job_id = job.id
+    finally:
+        db.close()
+
+    if BACKGROUND:
+        _dispatch(job_id, base_url)
+    elif WORKERS > 0:
+        _pool().submit(_execute, job_id, run)
+    else:
+        _execute(job_id, run)
+    db = database.SessionLocal()
+    try:
+        return get(db, job_id)
+    finally:
+        db.close()
@@ -0,0 +1,69 @@
+"""
+Import routers on their first request instead of at startup.
+
+A cold start on Netlify (AWS Lambda) pays for every module main imports, even
+though a single invocation only ever reaches one router. In lazy mode each
+router's module, with whatever it imports (NumPy for the wizard, httpx, pypdf
+and BeautifulSoup for the scraper), is imported and included in the app the
+first time a request path falls under its prefix. A request for the OpenAPI
+schema loads them all, so /docs stays complete.
+"""
+import importlib
+import threading
+from typing import Dict
+
+from fastapi import FastAPI
+
+
+class RouterLoader:
+    """Includes ``module.router`` for each prefix in ``routers``, once."""
+
+    def __init__(self, app: FastAPI, routers: Dict[str, str]):
+        self.app = app
+        self.routers = routers
+        self.loaded = set()
+        self._lock = threading.Lock()
+
+    def load(self, prefix: str) -> None:
+        if prefix in self.loaded:
+            return
+        with self._lock:
+            if prefix in self.loaded:
+                return
+            module = importlib.import_module(self.routers[prefix])
+            self.app.include_router(module.router)
+            # The schema was generated without this router's routes
+            self.app.openapi_schema = None
+            self.loaded.add(prefix)
+
+    def load_all(self) -> None:
+        for prefix in self.routers:
+            self.load(prefix)
+
+    def prefix_for(self, path: str):
+        for prefix in self.routers:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return None
+
+
+class LoadOnFirstRequest:
+    """ASGI middleware that has the loader include a request's router before routing it."""
+
+    def __init__(self, app, loader: RouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            root_path = scope.get("root_path", "")
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            if path == self.loader.app.openapi_url:
+                self.loader.load_all()
+            else:
+                prefix = self.loader.prefix_for(path)
+                if prefix is not None:
+                    self.loader.load(prefix)
+        await self.app(scope, receive, send)
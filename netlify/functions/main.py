@@ -1,14 +1,26 @@
-from fastapi import FastAPI
+import os
+import secrets
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routes import universities, wizard, insights, scrape
-from database import Base, engine
+from fastapi.responses import PlainTextResponse
+import compression, instrumentation, lazy_routers
+
+# Router modules by prefix, in the order they are included
+ROUTERS = {
+    "/universities": "routes.universities",
+    "/wizard": "routes.wizard",
+    "/insights": "routes.insights",
+    "/scrape": "routes.scrape",
+    "/search": "routes.search",
+}
+# Import each router on its first request; on by default on Netlify, where every cold start pays for imports
+LAZY_ROUTERS = os.getenv("LAZY_ROUTERS", "1" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "0") == "1"
 
 app = FastAPI(title="Sekelafinder api")
 
-@app.on_event("startup")
-def on_startup():
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+# The schema is managed by migrations (python manage.py migrate), run before
+# the app is deployed rather than on a cold start
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -20,10 +32,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
+# Brotli or gzip for bodies over COMPRESS_MIN_SIZE bytes
+app.add_middleware(compression.CompressionMiddleware)
 
 # Include routers
-app.include_router(universities.router)
-app.include_router(wizard.router)
-app.include_router(insights.router)
-app.include_router(scrape.router)
+routers = lazy_routers.RouterLoader(app, ROUTERS)
+if LAZY_ROUTERS:
+    app.add_middleware(lazy_routers.LoadOnFirstRequest, loader=routers)
+else:
+    routers.load_all()
+# Outermost, so its timings include router imports and compression
+app.add_middleware(instrumentation.RequestTimingMiddleware)
+
+
+@app.get(instrumentation.METRICS_PATH, include_in_schema=False)
+def metrics(request: Request):
+    """Request latency, SQL and serialization histograms in the Prometheus text format."""
+    if not instrumentation.METRICS_TOKEN:
+        if instrumentation.METRICS_REQUIRE_TOKEN:
+            raise HTTPException(status_code=404, detail="Not Found")
+    elif not secrets.compare_digest(request.headers.get("authorization", ""),
+                                    f"Bearer {instrumentation.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Missing or invalid metrics token")
+    return PlainTextResponse(instrumentation.render_metrics(), media_type="text/plain; version=0.0.4")
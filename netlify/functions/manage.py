@@ -0,0 +1,94 @@
+"""
+Maintenance commands for the Sekela API.
+
+    python manage.py migrate [revision]
+    python manage.py explain
+    python manage.py export-static OUT_DIR
+    python manage.py rebuild-insights
+    python manage.py rebuild-search
+"""
+import argparse
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+
+import database, insights_store, query_plans, search_index, static_export
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def migrate(args):
+    command.upgrade(Config(ALEMBIC_INI), args.revision)
+
+
+def explain(args):
+    db = database.SessionLocal()
+    try:
+        results = query_plans.run(db)
+    finally:
+        db.close()
+    for result in results:
+        print(f"{'ok  ' if result.ok else 'FAIL'} {result.check.name} (expects {result.expected})")
+        if not result.ok or args.verbose:
+            print("     " + result.plan.replace("\n", "\n     "))
+    if not all(result.ok for result in results):
+        sys.exit(1)
+
+
+def export_static(args):
+    db = database.SessionLocal()
+    try:
+        manifest = static_export.export(db, args.out_dir)
+        # get_summary stores the insights row if it was missing
+        db.commit()
+    finally:
+        db.close()
+    print(f"Exported {manifest['universities']} universities (catalog version {manifest['version']}) "
+          f"to {os.path.join(args.out_dir, manifest['path'])}")
+
+
+def rebuild_insights(args):
+    db = database.SessionLocal()
+    try:
+        summary = insights_store.rebuild(db)
+        db.commit()
+        print(f"Rebuilt insights for {summary['total']} universities")
+    finally:
+        db.close()
+
+
+def rebuild_search(args):
+    search_index.ensure_index(database.engine)
+    db = database.SessionLocal()
+    try:
+        count = search_index.rebuild(db)
+        db.commit()
+        print(f"Indexed {count} universities for full-text search")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="Upgrade the database schema")
+    migrate_parser.add_argument("revision", nargs="?", default="head")
+    migrate_parser.set_defaults(func=migrate)
+    explain_parser = commands.add_parser("explain", help="Check that the list and wizard queries use their indexes")
+    explain_parser.add_argument("-v", "--verbose", action="store_true", help="Print every plan")
+    explain_parser.set_defaults(func=explain)
+    export_parser = commands.add_parser("export-static", help="Write the catalog and insights as static JSON files")
+    export_parser.add_argument("out_dir", help="e.g. ../../frontend/dist/data")
+    export_parser.set_defaults(func=export_static)
+    commands.add_parser("rebuild-insights", help="Recompute the stored insights from the catalog tables") \
+        .set_defaults(func=rebuild_insights)
+    commands.add_parser("rebuild-search", help="Re-index the catalog for full-text search") \
+        .set_defaults(func=rebuild_search)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
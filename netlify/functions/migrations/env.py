@@ -0,0 +1,42 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import database, models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+# Created by raw DDL in migrations (an FTS5 table and its shadow tables on SQLite), not models.py
+UNMANAGED_TABLES = "university_search"
+
+
+def include_name(name, type_, parent_names):
+    """Keep autogenerate from proposing to drop the search index tables."""
+    if type_ == "table":
+        return not name.startswith(UNMANAGED_TABLES)
+    return True
+
+
+def run_migrations_offline():
+    context.configure(url=database.DATABASE_URL, target_metadata=target_metadata,
+                      literal_binds=True, render_as_batch=True, include_name=include_name)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with database.engine.connect() as connection:
+        # Batch mode lets SQLite alter tables by copying them
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True,
+                          include_name=include_name)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
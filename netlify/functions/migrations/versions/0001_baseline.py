@@ -0,0 +1,60 @@
+"""Catalog tables as the API first shipped them
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by create_all before migrations existed already have
+    # these tables; they are adopted as they are and brought up to date by the
+    # later revisions
+    if sa.inspect(op.get_bind()).has_table("universities"):
+        return
+
+    op.create_table(
+        "universities",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("acronym", sa.String),
+        sa.Column("region", sa.String),
+        sa.Column("location", sa.String),
+        sa.Column("type", sa.String),
+        sa.Column("avg_fees", sa.Integer),
+        sa.Column("difficulty", sa.String),
+        sa.Column("description", sa.Text),
+        sa.Column("admission_requirements", sa.Text),
+    )
+    op.create_index("ix_universities_id", "universities", ["id"])
+    op.create_table(
+        "programs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("university_id", sa.Integer, sa.ForeignKey("universities.id")),
+        sa.Column("name", sa.String),
+        sa.Column("duration", sa.Float),
+        sa.Column("program_difficulty", sa.String),
+        sa.Column("prospects", sa.Text),
+    )
+    op.create_index("ix_programs_id", "programs", ["id"])
+    op.create_table(
+        "facilities",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("university_id", sa.Integer, sa.ForeignKey("universities.id")),
+        sa.Column("name", sa.String),
+    )
+    op.create_index("ix_facilities_id", "facilities", ["id"])
+
+
+def downgrade():
+    op.drop_table("facilities")
+    op.drop_table("programs")
+    op.drop_table("universities")
@@ -0,0 +1,163 @@
+"""Catalog version, stored insights, search index, scrape jobs and dedup columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# dedup.name_key and the search_index DDL as they were at this revision, so
+# later changes to the app do not change what this migration does
+ABBREVIATIONS = {
+    "univ": "university",
+    "uni": "university",
+    "inst": "institute",
+    "coll": "college",
+    "tech": "technology",
+    "sci": "science",
+    "st": "saint",
+    "&": "and",
+}
+STOPWORDS = frozenset({"of", "the", "in", "at", "for", "and"})
+TOKEN_RE = re.compile(r"[a-z0-9]+|&")
+
+SQLITE_SEARCH_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS university_search USING fts5(
+    name, acronym, place, programs, prospects, description,
+    tokenize = 'porter unicode61'
+)
+"""
+POSTGRES_SEARCH_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS university_search (
+        university_id INTEGER PRIMARY KEY REFERENCES universities(id) ON DELETE CASCADE,
+        name TEXT, acronym TEXT, place TEXT, programs TEXT, prospects TEXT, description TEXT,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '') || ' ' || coalesce(acronym, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(programs, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(place, '') || ' ' || coalesce(prospects, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'D')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_university_search_document ON university_search USING GIN (document)",
+)
+
+
+def name_key(name):
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    words = (ABBREVIATIONS.get(word, word) for word in TOKEN_RE.findall(text))
+    return " ".join(word for word in words if word not in STOPWORDS) or None
+
+
+def _check_duplicates(bind, universities):
+    """Stop, naming the rows, if the unique index cannot be built because names normalize alike."""
+    shared = (
+        sa.select(universities.c.normalized_name).where(universities.c.normalized_name.isnot(None))
+        .group_by(universities.c.normalized_name).having(sa.func.count() > 1)
+    )
+    rows = bind.execute(
+        sa.select(universities.c.normalized_name, universities.c.id, universities.c.name)
+        .where(universities.c.normalized_name.in_(shared))
+        .order_by(universities.c.normalized_name, universities.c.id)
+    ).all()
+    if not rows:
+        return
+    groups = {}
+    for key, uni_id, name in rows:
+        groups.setdefault(key, []).append(f"{uni_id} {name!r}")
+    raise RuntimeError(
+        "Cannot create uq_universities_normalized_name: these universities have names that normalize to the "
+        "same key. Delete or rename all but one in each group (with their programs and facilities), then "
+        "migrate again.\n" + "\n".join(f"  {key!r}: {', '.join(names)}" for key, names in groups.items())
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Until this revision the app created these at startup, so any of them may
+    # already exist
+    columns = {c["name"] for c in inspector.get_columns("universities")}
+    with op.batch_alter_table("universities") as batch:
+        if "content_hash" not in columns:
+            batch.add_column(sa.Column("content_hash", sa.String(64)))
+        if "normalized_name" not in columns:
+            batch.add_column(sa.Column("normalized_name", sa.String))
+
+    universities = sa.table("universities", sa.column("id", sa.Integer), sa.column("name", sa.String),
+                            sa.column("normalized_name", sa.String))
+    rows = bind.execute(
+        sa.select(universities.c.id, universities.c.name).where(universities.c.normalized_name.is_(None))
+    ).all()
+    if rows:
+        bind.execute(
+            universities.update().where(universities.c.id == sa.bindparam("uni_id"))
+            .values(normalized_name=sa.bindparam("key")),
+            [{"uni_id": uni_id, "key": name_key(name)} for uni_id, name in rows],
+        )
+
+    unique = [c["column_names"] for c in inspector.get_unique_constraints("universities")]
+    unique += [i["column_names"] for i in inspector.get_indexes("universities") if i["unique"]]
+    if ["normalized_name"] not in unique:
+        _check_duplicates(bind, universities)
+        op.create_index("uq_universities_normalized_name", "universities", ["normalized_name"], unique=True)
+
+    if not inspector.has_table("catalog_meta"):
+        op.create_table(
+            "catalog_meta",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("version", sa.Integer, nullable=False),
+        )
+    if not inspector.has_table("insights"):
+        op.create_table(
+            "insights",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("payload", sa.Text, nullable=False),
+            sa.Column("updated_at", sa.DateTime),
+        )
+    if not inspector.has_table("scrape_jobs"):
+        op.create_table(
+            "scrape_jobs",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("kind", sa.String, nullable=False),
+            sa.Column("status", sa.String, nullable=False),
+            sa.Column("stage", sa.String),
+            sa.Column("progress", sa.Float, nullable=False),
+            sa.Column("counts", sa.Text),
+            sa.Column("result", sa.Text),
+            sa.Column("error", sa.Text),
+            sa.Column("active_key", sa.String, unique=True),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("started_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+            sa.Column("finished_at", sa.DateTime),
+        )
+        op.create_index("ix_scrape_jobs_id", "scrape_jobs", ["id"])
+
+    if bind.dialect.name == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+    else:
+        op.execute(SQLITE_SEARCH_DDL)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS university_search")
+    op.drop_table("scrape_jobs")
+    op.drop_table("insights")
+    op.drop_table("catalog_meta")
+    op.drop_index("uq_universities_normalized_name", "universities")
+    with op.batch_alter_table("universities") as batch:
+        batch.drop_column("normalized_name")
+        batch.drop_column("content_hash")
@@ -0,0 +1,34 @@
+"""Indexes for the wizard and list filters, sort keys and relationship loads
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    # Equality columns first, so region-only or region+type filters use a prefix
+    ("ix_universities_region_type_difficulty_avg_fees", "universities",
+     ["region", "type", "difficulty", "avg_fees"]),
+    ("ix_universities_avg_fees", "universities", ["avg_fees"]),
+    ("ix_universities_name", "universities", ["name"]),
+    # Foreign keys: selectinload batches and the program-interest EXISTS
+    ("ix_programs_university_id", "programs", ["university_id"]),
+    ("ix_facilities_university_id", "facilities", ["university_id"]),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table, if_exists=True)
@@ -0,0 +1,24 @@
+"""Index the expression ?sort=avg_fees orders and pages on
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import text
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Missing fees sort as 0 (crud.SORT_KEYS["avg_fees"]); the id is the keyset tie-breaker
+    op.create_index("ix_universities_fees_sort", "universities", [text("coalesce(avg_fees, 0)"), "id"],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_universities_fees_sort", "universities", if_exists=True)
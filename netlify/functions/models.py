@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, Index, func, literal_column
 from sqlalchemy.orm import relationship
-from .database import Base
+from database import Base
 
 class University(Base):
     __tablename__ = "universities"
+    # Kept in step with the migrations in migrations/versions
+    __table_args__ = (
+        # Wizard and list filters: equality on region/type/difficulty, range on fees
+        Index("ix_universities_region_type_difficulty_avg_fees", "region", "type", "difficulty", "avg_fees"),
+        Index("ix_universities_avg_fees", "avg_fees"),
+        Index("ix_universities_name", "name"),
+        Index("uq_universities_normalized_name", "normalized_name", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -15,15 +23,22 @@ class University(Base):
     difficulty = Column(String)
     description = Column(Text)
     admission_requirements = Column(Text)
+    # Hash of the scraped record, used by the merge refresh to skip unchanged rows
+    content_hash = Column(String(64))
+    # dedup.name_key(name): one university per canonical name
+    normalized_name = Column(String)
     
     programs = relationship("Program", back_populates="university")
     facilities = relationship("Facility", back_populates="university")
 
+# ?sort=avg_fees orders and pages on crud.SORT_KEYS["avg_fees"], which counts missing fees as 0
+Index("ix_universities_fees_sort", func.coalesce(University.avg_fees, literal_column("0")), University.id)
+
 class Program(Base):
     __tablename__ = "programs"
     
     id = Column(Integer, primary_key=True, index=True)
-    university_id = Column(Integer, ForeignKey("universities.id"))
+    university_id = Column(Integer, ForeignKey("universities.id"), index=True)
     name = Column(String)
     duration = Column(Float)
     program_difficulty = Column(String)
@@ -35,7 +50,41 @@ class Facility(Base):
     __tablename__ = "facilities"
     
     id = Column(Integer, primary_key=True, index=True)
-    university_id = Column(Integer, ForeignKey("universities.id"))
+    university_id = Column(Integer, ForeignKey("universities.id"), index=True)
     name = Column(String)
     
     university = relationship("University", back_populates="facilities")
+
+class CatalogMeta(Base):
+    __tablename__ = "catalog_meta"
+
+    # Single row (id=1) holding the catalog version, bumped whenever the scraper writes
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class InsightsSnapshot(Base):
+    __tablename__ = "insights"
+
+    # Single row (id=1) with the precomputed /insights/summary payload as JSON
+    id = Column(Integer, primary_key=True)
+    payload = Column(Text, nullable=False)
+    updated_at = Column(DateTime)
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    stage = Column(String)
+    progress = Column(Float, nullable=False, default=0)
+    counts = Column(Text)
+    result = Column(Text)
+    error = Column(Text)
+    # "catalog" while the job is queued or running, NULL afterwards: the unique
+    # constraint lets only one job write the catalog at a time
+    active_key = Column(String, unique=True)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -0,0 +1,108 @@
+"""
+EXPLAIN checks for the queries behind /universities and the wizard.
+
+Each check builds its query with the same helpers the routes use, asks the
+database for its plan and passes when the plan uses the expected index. The
+list filters run in SQL when the catalog cache is off; the wizard scores the
+in-memory catalog snapshot, whose load batches programs and facilities by
+university id, and ranks academic interests with the full-text index. On
+Postgres sequential scans are disabled for the check, since the planner
+rightly prefers them on a table of a few dozen rows; what matters is that an
+index able to serve the query exists. Run with ``python manage.py explain``.
+"""
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import crud, models, schemas, search_index
+
+
+@dataclass
+class Check:
+    name: str
+    index: str
+    # An ORM query, or a SQL statement with its parameters bound
+    query: Callable[[Session], object]
+    # What the plan shows instead on SQLite, where an FTS5 match is not a named index
+    sqlite_index: Optional[str] = None
+
+    def expected(self, dialect: str) -> str:
+        return self.sqlite_index if dialect == "sqlite" and self.sqlite_index else self.index
+
+
+@dataclass
+class Result:
+    check: Check
+    plan: str
+    expected: str
+
+    @property
+    def ok(self) -> bool:
+        return self.expected in self.plan
+
+
+def _filtered(**given):
+    prefs = schemas.WizardPreferences(**{"region": None, "type": None, "max_fees": None,
+                                         "academic_interest": None, "difficulty": None, **given})
+    return lambda db: crud.filter_universities(db.query(models.University), prefs)
+
+
+def _page(sort: str):
+    """A deep keyset page, continuing after the university with id 500."""
+    cursor = crud.encode_cursor(SimpleNamespace(id=500, name="M", avg_fees=1500000), sort)
+    return lambda db: crud.universities_query(db, limit=20, include=(), sort=sort, cursor=cursor)
+
+
+def _interest(db: Session):
+    """search_index.match_scores, as the wizard runs it for an academic interest."""
+    return search_index.search_statement(db.get_bind().dialect.name, "computer engineering",
+                                         limit=10_000, match_any=True)
+
+
+CHECKS = (
+    Check("list: region, type, difficulty and fees", "ix_universities_region_type_difficulty_avg_fees",
+          _filtered(region="Dar es Salaam", type="Public", difficulty="Moderate", max_fees=2000000)),
+    Check("list: region", "ix_universities_region_type_difficulty_avg_fees",
+          _filtered(region="Arusha")),
+    Check("list: max fees", "ix_universities_avg_fees", _filtered(max_fees=1500000)),
+    Check("list: sorted by name", "ix_universities_name", _page("name")),
+    Check("list: sorted by fees", "ix_universities_fees_sort", _page("avg_fees")),
+    Check("list: sorted by fees, descending", "ix_universities_fees_sort", _page("-avg_fees")),
+    Check("list: academic interest", "ix_programs_university_id", _filtered(academic_interest="Engineering")),
+    Check("wizard: academic interest", "ix_university_search_document", _interest,
+          sqlite_index="university_search VIRTUAL TABLE INDEX 0:M"),
+    Check("list page and wizard snapshot: programs", "ix_programs_university_id",
+          lambda db: db.query(models.Program).filter(models.Program.university_id.in_([1, 2, 3]))),
+    Check("list page and wizard snapshot: facilities", "ix_facilities_university_id",
+          lambda db: db.query(models.Facility).filter(models.Facility.university_id.in_([1, 2, 3]))),
+)
+
+
+def explain(db: Session, query) -> str:
+    bind = db.get_bind()
+    # With bound parameters, as the routes send the query: SQLite only matches an
+    # expression index whose constants appear in the SQL text itself
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(bind, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    connection = db.connection()
+    if bind.dialect.name == "postgresql":
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.exec_driver_sql("EXPLAIN " + str(compiled), params).all()
+    else:
+        # (id, parent, notused, detail)
+        rows = [(row[-1],) for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params)]
+    return "\n".join(row[0] for row in rows)
+
+
+def run(db: Session) -> List[Result]:
+    dialect = db.get_bind().dialect.name
+    try:
+        return [Result(check, explain(db, check.query(db)), check.expected(dialect)) for check in CHECKS]
+    finally:
+        db.rollback()
@@ -0,0 +1,39 @@
+"""
+Fast JSON responses for data that is already plain and trusted.
+
+Catalog snapshots are validated once when they are loaded, so re-validating
+every university against the response model on each request only costs CPU.
+Routes serving from a snapshot return ``fast_json(...)`` with plain dicts
+(CatalogSnapshot.as_dict) instead; FastAPI sends a returned Response as is,
+skipping response_model validation, and orjson encodes it. The response
+model stays on the route for the OpenAPI schema and for the database path.
+"""
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+import instrumentation
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with instrumentation.timed("serialize"):
+            return dumps(content)
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Encode ``content`` without validation. Headers set on the route's injected
+    ``response`` (validators, cursors) are carried over, since FastAPI only
+    merges them into responses it builds itself.
+    """
+    result = FastJSONResponse(content)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -1,28 +1,23 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-import database, models
-from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+import database, http_cache, insights_store
 
-router = APIRouter(prefix="/insights", tags=["Insights"])
-
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(prefix="/insights", tags=["Insights"],
+                   dependencies=[Depends(http_cache.conditional_get(database.get_async_db))])
 
 @router.get("/regions")
-def regions_insight(db: Session = Depends(get_db)):
-    universities = db.query(models.University).all()
-    return dict(Counter([u.region for u in universities]))
+async def regions_insight(db: AsyncSession = Depends(database.get_async_db)):
+    return (await db.run_sync(insights_store.get_summary))["regions"]
 
 @router.get("/types")
-def types_insight(db: Session = Depends(get_db)):
-    universities = db.query(models.University).all()
-    return dict(Counter([u.type for u in universities]))
+async def types_insight(db: AsyncSession = Depends(database.get_async_db)):
+    return (await db.run_sync(insights_store.get_summary))["types"]
 
 @router.get("/difficulty")
-def difficulty_insight(db: Session = Depends(get_db)):
-    universities = db.query(models.University).all()
-    return dict(Counter([u.difficulty for u in universities]))
+async def difficulty_insight(db: AsyncSession = Depends(database.get_async_db)):
+    return (await db.run_sync(insights_store.get_summary))["difficulty"]
+
+@router.get("/summary")
+async def insights_summary(db: AsyncSession = Depends(database.get_async_db)):
+    """Every breakdown the dashboard needs, plus fee distribution and programs per region."""
+    return await db.run_sync(insights_store.get_summary)
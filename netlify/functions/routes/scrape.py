@@ -1,17 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-import requests
-from bs4 import BeautifulSoup
-import database, models
+import catalog, database, dedup, ingest, insights_store, jobs, models, schemas, search_index, static_export
+# fetcher, tcu_pdf and BeautifulSoup are imported by the functions that scrape, so
+# starting or polling a job does not load an HTTP client and two document parsers
 
 router = APIRouter(prefix="/scrape", tags=["Scraper"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+TCU_PDF_URL = "https://tcu.go.tz/sites/default/files/file_uploads/documents/2025-07/LIST%20OF%20UNIVERSITY%20INSTITUTIONS%20IN%20TANZANIA%20AS%20OF%20JULY%2012-%202025.pdf"
+NACTE_URL = "https://www.nactvet.go.tz/"
+# Every remote page the scrapers read, fetched together by fetch_sources()
+SOURCES = {"tcu": TCU_PDF_URL, "nacte": NACTE_URL}
 
 # Example helper to add university to DB
 def add_university(db: Session, uni_data: dict):
@@ -24,13 +23,15 @@ def add_university(db: Session, uni_data: dict):
         avg_fees=uni_data.get("avg_fees"),
         difficulty=uni_data.get("difficulty", "Medium"),
         description=uni_data.get("description", ""),
-        admission_requirements=uni_data.get("admission_requirements", "")
+        admission_requirements=uni_data.get("admission_requirements", ""),
+        normalized_name=dedup.name_key(uni_data.get("name"))
     )
     db.add(uni)
     db.commit()
     db.refresh(uni)
     
     # Add programs
+    programs = []
     for p in uni_data.get("programs", []):
         program = models.Program(
             university_id=uni.id,
@@ -40,6 +41,7 @@ def add_university(db: Session, uni_data: dict):
             prospects=p.get("prospects", "")
         )
         db.add(program)
+        programs.append(program)
     
     # Add facilities
     for f in uni_data.get("facilities", []):
@@ -49,21 +51,17 @@ def add_university(db: Session, uni_data: dict):
         )
         db.add(facility)
     
+    insights_store.invalidate(db)
+    search_index.index_universities(db, [(uni, programs)])
     db.commit()
     return uni
 
 # Scraper functions
-def scrape_tcu_universities():
-    """Scrape universities from TCU official PDF list"""
-    universities = []
-    
+def scrape_tcu_universities(pdf=None):
+    """Parse the official TCU PDF list (a fetcher.FetchResult) and merge in our curated details"""
+    import tcu_pdf
     try:
-        # Get the official PDF from TCU
-        print("Fetching official TCU university list...")
-        pdf_url = "https://tcu.go.tz/sites/default/files/file_uploads/documents/2025-07/LIST%20OF%20UNIVERSITY%20INSTITUTIONS%20IN%20TANZANIA%20AS%20OF%20JULY%2012-%202025.pdf"
-        
-        # For production, we should download and parse the PDF
-        # For now, we'll use the comprehensive data we extracted
+        # Curated details (programs, fees, facilities) for institutions on the TCU list
         tcu_universities = [
             {
                 "name": "University of Dar es Salaam",
@@ -252,23 +250,82 @@ def scrape_tcu_universities():
             }
         ]
         
-        print(f"Successfully loaded {len(tcu_universities)} universities from TCU")
-        return tcu_universities
+        if pdf is not None and pdf.ok:
+            institutions = list(tcu_pdf.parse_bytes(pdf.content))
+        else:
+            print("TCU list not downloaded, parsing the bundled copy...")
+            institutions = list(tcu_pdf.parse(tcu_pdf.BUNDLED_PDF))
+        if not institutions:
+            raise Exception("No institutions found in the TCU list")
+        
+        print(f"Successfully parsed {len(institutions)} institutions from the TCU list")
+        return combine_sources(institutions, tcu_universities)
         
     except Exception as e:
         print(f"TCU scraping failed: {e}. Using comprehensive fallback data.")
         # Return the comprehensive data even if there's an error
         return tcu_universities
 
-def scrape_nacte_universities():
-    """Scrape universities from NACTE with fallback to sample data"""
-    url = "https://www.nactvet.go.tz/"
+def fetch_sources():
+    """Fetch every source page concurrently, revalidating cached copies."""
+    import fetcher
+    results = fetcher.fetch_all_sync(SOURCES.values())
+    for result in results.values():
+        state = "cached" if result.from_cache else result.status
+        print(f"Fetched {result.url}: {state}" + (f" ({result.error})" if result.error else ""))
+    return {name: results[url] for name, url in SOURCES.items()}
+
+def _is_empty(value):
+    return value is None or value == "" or value == []
+
+def combine_sources(*sources):
+    """
+    Merge lists of scraped institutions. A record matching one already seen, by
+    name or acronym, only fills in the details that record is missing.
+    """
+    combined = []
+    by_key = {}
+    for records in sources:
+        for record in records:
+            keys = [k.casefold() for k in (record.get("name"), record.get("acronym")) if k]
+            match = next((by_key[k] for k in keys if k in by_key), None)
+            if match is None:
+                match = dict(record)
+                combined.append(match)
+            else:
+                for field, value in record.items():
+                    if not _is_empty(value) and _is_empty(match.get(field)):
+                        match[field] = value
+            for k in keys:
+                by_key.setdefault(k, match)
+    return combined
+
+def _no_progress(stage, fraction, **counts):
+    pass
+
+def collect_universities(progress=_no_progress):
+    """Every institution from all sources, with the curated details merged in."""
+    import tcu_pdf
+    progress("fetching", 0.05)
+    pages = fetch_sources()
+    progress("parsing", 0.3, sources=sum(1 for page in pages.values() if page.ok))
+    universities = combine_sources(scrape_tcu_universities(pages["tcu"]), scrape_nacte_universities(pages["nacte"]))
+    for uni in universities:
+        if _is_empty(uni.get("description")) and uni.get("status"):
+            uni["description"] = tcu_pdf.describe(uni)
+    return universities
+
+def scrape_nacte_universities(page=None):
+    """Scrape universities from NACTE (a fetcher.FetchResult) with fallback to sample data"""
+    from bs4 import BeautifulSoup
     universities = []
     
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        if page is None:
+            page = fetch_sources()["nacte"]
+        if not page.ok:
+            raise Exception(page.error)
+        soup = BeautifulSoup(page.text, "html.parser")
         
         # Look for institution listings - these selectors may need adjustment
         institution_links = soup.find_all("a", href=lambda x: x and "institut" in x.lower())
@@ -574,84 +631,131 @@ def scrape_nacte_universities():
     
     return private_institutions
 
-@router.post("/")
-def scrape_universities(db: Session = Depends(get_db)):
+def run_scrape(db: Session, progress=_no_progress):
     """
-    Scrape TCU and NACTE universities and save to database.
+    Scrape TCU and NACTE universities and save the new ones to the database.
     """
     print("Starting comprehensive university data scraping...")
     
     # Get data from both sources
-    tcu_unis = scrape_tcu_universities()
-    nacte_unis = scrape_nacte_universities()
+    all_universities = collect_universities(progress)
+    progress("matching", 0.5, scraped=len(all_universities))
     
-    total_added = 0
+    new_unis = []
     total_skipped = 0
     
-    for uni_data in tcu_unis + nacte_unis:
-        # Check for duplicates by name
-        existing = db.query(models.University).filter(models.University.name == uni_data["name"]).first()
-        if not existing:
-            try:
-                add_university(db, uni_data)
-                total_added += 1
-                print(f"Added: {uni_data['name']}")
-            except Exception as e:
-                print(f"Error adding {uni_data['name']}: {e}")
+    # Check for duplicates by normalized name, acronym and similar names, including
+    # variants of the same institution within this scrape
+    names = dedup.NameIndex.load(db)
+    for uni_data in all_universities:
+        if names.match(uni_data.get("name"), uni_data.get("acronym")) is None:
+            new_unis.append(uni_data)
+            # Not inserted yet, so it gets a placeholder id
+            names.add(-len(new_unis), uni_data.get("name"), uni_data.get("acronym"))
         else:
             total_skipped += 1
             print(f"Skipped (already exists): {uni_data['name']}")
     
-    message = f"Scraping complete! Added {total_added} new universities, skipped {total_skipped} existing ones."
+    # One transaction for every new university, its programs and facilities
+    progress("saving", 0.6, skipped=total_skipped)
+    report = ingest.bulk_load(db, new_unis)
+    db.commit()
+    for error in report.errors:
+        print(f"Error adding {error.name}: {error.error}")
+    
+    if report.added:
+        catalog.bump_version(db)
+        static_export.request_rebuild()
+    message = f"Scraping complete! Added {report.added} new universities, skipped {total_skipped} existing ones."
     print(message)
-    return {"message": message}
+    return {"message": message, "changes": {"added": report.added, "skipped": total_skipped},
+            "errors": report.as_dict()["errors"]}
 
-@router.get("/seed")
-def seed_database(db: Session = Depends(get_db)):
+def run_refresh(db: Session, mode: str = "merge", progress=_no_progress):
     """
-    A temporary, one-time endpoint to easily seed the database by visiting a URL.
-    This should be removed after the initial data population.
-    """
-    return refresh_universities(db)
+    Refresh the database with the latest data from TCU and NACTE.
 
-@router.post("/refresh")
-def refresh_universities(db: Session = Depends(get_db)):
-    """
-    Clear all existing universities and refresh with latest data from TCU and NACTE.
+    mode=merge only writes universities that were added, changed or removed
+    since the last scrape, so unchanged universities keep their ids.
+    mode=replace clears every university and loads the scraped data from scratch.
     """
-    print("Starting complete database refresh...")
+    print(f"Starting database refresh ({mode})...")
     
-    try:
-        # Clear existing data
+    # Get fresh data
+    all_universities = collect_universities(progress)
+    progress("saving", 0.6, scraped=len(all_universities))
+    
+    if mode == "merge":
+        report = ingest.merge(db, all_universities)
+    else:
+        # Clear and reload in a single transaction, so a failure leaves the old data in place
         db.query(models.Facility).delete()
         db.query(models.Program).delete()
         db.query(models.University).delete()
-        db.commit()
-        print("Cleared existing university data")
-        
-        # Get fresh data
-        tcu_unis = scrape_tcu_universities()
-        nacte_unis = scrape_nacte_universities()
-        
-        total_added = 0
-        all_universities = tcu_unis + nacte_unis
+        search_index.clear(db)
         
         print(f"Adding {len(all_universities)} universities to database...")
-        
-        for uni_data in all_universities:
-            try:
-                add_university(db, uni_data)
-                total_added += 1
-                print(f"Added: {uni_data['name']} ({uni_data['type']})")
-            except Exception as e:
-                print(f"Error adding {uni_data['name']}: {e}")
-        
-        message = f"Database refresh complete! Added {total_added} universities total."
-        print(message)
-        return {"message": message}
-        
-    except Exception as e:
-        db.rollback()
-        error_msg = f"Database refresh failed: {str(e)}"
-        print(error_msg)
-        return {"error": error_msg}
+        report = ingest.bulk_load(db, all_universities)
+    db.commit()
+    for error in report.errors:
+        print(f"Error adding {error.name}: {error.error}")
+    
+    if mode == "replace" or report.changed:
+        catalog.bump_version(db)
+        static_export.request_rebuild()
+    changes = report.as_dict()
+    if mode == "merge":
+        message = (f"Database refresh complete! Added {report.added}, updated {report.updated}, "
+                   f"removed {report.removed}, unchanged {report.unchanged}.")
+    else:
+        message = f"Database refresh complete! Added {report.added} universities total."
+    print(message)
+    return {"message": message, "changes": {k: changes[k] for k in ("added", "updated", "removed", "unchanged")},
+            "errors": changes["errors"]}
+
+# Job functions by kind, for jobs.run_queued in the scrape-background function
+JOB_RUNNERS = {
+    "scrape": run_scrape,
+    "refresh:merge": lambda db, progress: run_refresh(db, "merge", progress),
+    "refresh:replace": lambda db, progress: run_refresh(db, "replace", progress),
+}
+
+def _start_job(kind, request: Request):
+    try:
+        return jobs.start(kind, JOB_RUNNERS[kind], f"{request.url.scheme}://{request.url.netloc}")
+    except jobs.JobConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job": jsonable_encoder(e.job)})
+
+@router.post("/", response_model=schemas.ScrapeJob, status_code=202)
+def scrape_universities(request: Request):
+    """
+    Scrape TCU and NACTE universities in the background and add the new ones.
+    Poll /scrape/jobs/{id} for progress.
+    """
+    return _start_job("scrape", request)
+
+@router.get("/seed", response_model=schemas.ScrapeJob, status_code=202)
+def seed_database(request: Request):
+    """
+    A temporary, one-time endpoint to easily seed the database by visiting a URL.
+    This should be removed after the initial data population.
+    """
+    return refresh_universities(request)
+
+@router.post("/refresh", response_model=schemas.ScrapeJob, status_code=202)
+def refresh_universities(request: Request, mode: str = "merge"):
+    """
+    Refresh the database from TCU and NACTE in the background; see run_refresh
+    for the modes. A refresh requested while one is running attaches to it.
+    Poll /scrape/jobs/{id} for progress.
+    """
+    if mode not in ("merge", "replace"):
+        raise HTTPException(status_code=400, detail="mode must be 'merge' or 'replace'")
+    return _start_job(f"refresh:{mode}", request)
+
+@router.get("/jobs/{job_id}", response_model=schemas.ScrapeJob)
+def get_job(job_id: int, db: Session = Depends(database.get_db)):
+    job = jobs.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
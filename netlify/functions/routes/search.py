@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+import catalog, crud, schemas, database, http_cache, search_index
+
+router = APIRouter(prefix="/search", tags=["Search"],
+                   dependencies=[Depends(http_cache.conditional_get(database.get_db))])
+
+@router.get("/", response_model=List[schemas.SearchResult])
+def search_universities(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100),
+                        db: Session = Depends(database.get_db)):
+    """
+    Ranked full-text search over university names, descriptions, programs and
+    career prospects. Snippets mark the matched words with <mark>.
+    """
+    results = search_index.search(db, q, limit=limit)
+    snapshot = catalog.get_snapshot(db)
+    results = [
+        (snapshot.get(uni_id) if snapshot else crud.get_university(db, uni_id), relevance, snippet)
+        for uni_id, relevance, snippet in results
+    ]
+    return [
+        {"university": uni, "relevance": round(relevance, 4), "snippet": snippet}
+        for uni, relevance, snippet in results if uni is not None
+    ]
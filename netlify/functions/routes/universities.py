@@ -1,24 +1,118 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-import crud, schemas, database
+import functools
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import bulk_export, catalog, comparison, crud, schemas, database, http_cache, responses, utils
 
-router = APIRouter(prefix="/universities", tags=["Universities"])
+UNIVERSITY_COLUMNS = ("id",) + tuple(schemas.UniversityBase.model_fields)
 
-def get_db():
-    db = database.SessionLocal()
+router = APIRouter(prefix="/universities", tags=["Universities"],
+                   dependencies=[Depends(http_cache.conditional_get(database.get_async_db))])
+
+def _projection(include: Optional[str], fields: Optional[str]):
+    """Resolve ?include= and ?fields= into (relations to load, keys to return)."""
+    keys = utils.parse_csv(fields, UNIVERSITY_COLUMNS + crud.UNIVERSITY_RELATIONS)
+    if include is None:
+        relations = tuple(r for r in crud.UNIVERSITY_RELATIONS if r in keys)
+    else:
+        relations = utils.parse_csv(include)
+        keys += tuple(r for r in relations if r not in keys)
+
+    unknown = [k for k in keys if k not in UNIVERSITY_COLUMNS + crud.UNIVERSITY_RELATIONS]
+    unknown += [r for r in relations if r not in crud.UNIVERSITY_RELATIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    keys = set(k for k in keys if k in UNIVERSITY_COLUMNS or k in relations) | {"id"}
+    # In field order, as the response model would serialize them
+    return relations, tuple(k for k in schemas.UniversityProjection.model_fields if k in keys)
+
+@router.get("/", response_model=List[schemas.UniversityProjection], response_model_exclude_unset=True)
+async def list_universities(response: Response, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                      include: Optional[str] = None, fields: Optional[str] = None,
+                      region: Optional[str] = None, type: Optional[str] = None,
+                      max_fees: Optional[int] = None, difficulty: Optional[str] = None,
+                      academic_interest: Optional[str] = None, sort: str = "id",
+                      cursor: Optional[str] = None, count: bool = False,
+                      db: AsyncSession = Depends(database.get_async_db)):
+    """
+    List universities in a stable order. Pass the X-Next-Cursor response header back as
+    ?cursor= to fetch the next page; ?count=true adds the filtered total as X-Total-Count.
+    """
+    relations, keys = _projection(include, fields)
+    prefs = schemas.WizardPreferences(region=region, type=type, max_fees=max_fees,
+                                      difficulty=difficulty, academic_interest=academic_interest)
+    snapshot = await catalog.get_snapshot_async(db)
     try:
-        yield db
-    finally:
-        db.close()
+        options = dict(skip=skip, limit=limit, include=relations, prefs=prefs, sort=sort, cursor=cursor)
+        if snapshot:
+            universities, next_cursor = snapshot.page(**options)
+        else:
+            universities, next_cursor = await db.run_sync(functools.partial(crud.get_university_page, **options))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if count:
+        total = len(snapshot.filter(prefs)) if snapshot else await db.run_sync(crud.count_universities, prefs)
+        response.headers["X-Total-Count"] = str(total)
+    if snapshot:
+        rows = (snapshot.as_dict(uni) for uni in universities)
+        return responses.fast_json([{key: row[key] for key in keys} for row in rows], response)
+    return [{key: getattr(uni, key) for key in keys} for uni in universities]
 
-@router.get("/", response_model=List[schemas.University])
-def list_universities(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_universities(db, skip=skip, limit=limit)
+# Declared before /{uni_id}, like /compare
+@router.get("/export", response_class=StreamingResponse,
+            responses={200: {"content": {media_type: {} for media_type in bulk_export.FORMATS.values()}}})
+async def export_universities(response: Response, format: str = "ndjson",
+                              region: Optional[str] = None, type: Optional[str] = None,
+                              max_fees: Optional[int] = None, difficulty: Optional[str] = None,
+                              academic_interest: Optional[str] = None):
+    """
+    Every (matching) university as NDJSON, one object per line, or as CSV with one row per
+    program. Rows are streamed from a server-side cursor, so use this instead of paging
+    through /universities/ to pull the whole catalog.
+    """
+    if format not in bulk_export.FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown format '{format}', expected one of: {', '.join(bulk_export.FORMATS)}")
+    prefs = schemas.WizardPreferences(region=region, type=type, max_fees=max_fees,
+                                      difficulty=difficulty, academic_interest=academic_interest)
+    result = StreamingResponse(bulk_export.stream(format, prefs), media_type=bulk_export.FORMATS[format],
+                               headers={"Content-Disposition": f'attachment; filename="universities.{format}"'})
+    # Validators set by the router's conditional_get dependency
+    result.headers.raw.extend(response.headers.raw)
+    return result
+
+def _compare_rows(db, ids: List[int]) -> List[dict]:
+    return [catalog.to_schema(uni).model_dump() for uni in crud.get_universities_by_ids(db, ids)]
+
+# Declared before /{uni_id}, which would otherwise reject "compare" as an id
+@router.get("/compare", response_model=schemas.Comparison)
+async def compare_universities(response: Response, ids: str, db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Up to four universities side by side (?ids=3,1,7), in the order given, with their
+    programs aligned by field and fee differences computed.
+    """
+    try:
+        uni_ids = comparison.parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    snapshot = await catalog.get_snapshot_async(db)
+    if snapshot:
+        rows = [snapshot.as_dict(snapshot.get(i)) for i in uni_ids if snapshot.get(i)]
+    else:
+        rows = await db.run_sync(_compare_rows, uni_ids)
+    missing = [str(i) for i in uni_ids if i not in {row["id"] for row in rows}]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Universities not found: {', '.join(missing)}")
+    return responses.fast_json(comparison.compare(rows), response)
 
 @router.get("/{uni_id}", response_model=schemas.University)
-def get_university(uni_id: int, db: Session = Depends(get_db)):
-    uni = crud.get_university(db, uni_id)
+async def get_university(uni_id: int, response: Response, db: AsyncSession = Depends(database.get_async_db)):
+    snapshot = await catalog.get_snapshot_async(db)
+    uni = snapshot.get(uni_id) if snapshot else await db.run_sync(crud.get_university, uni_id)
     if not uni:
         raise HTTPException(status_code=404, detail="University not found")
-    return uni
+    return responses.fast_json(snapshot.as_dict(uni), response) if snapshot else uni
@@ -1,17 +1,53 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-import crud, schemas, database
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+import catalog, scoring, schemas, search_index, database, responses
 
 router = APIRouter(prefix="/wizard", tags=["Wizard"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+MAX_BATCH_SIZE = 1000
 
-@router.post("/recommendations", response_model=List[schemas.University])
-def get_recommendations(preferences: schemas.WizardPreferences, db: Session = Depends(get_db)):
-    return crud.get_recommendations(db, preferences)
+def _load_snapshot(db):
+    return catalog.load_snapshot(db, catalog.get_version(db))
+
+async def _matrix(db: AsyncSession) -> Tuple[catalog.CatalogSnapshot, scoring.CatalogMatrix]:
+    snapshot = await catalog.get_snapshot_async(db) or await db.run_sync(_load_snapshot)
+    return snapshot, scoring.get_matrix(snapshot)
+
+def _recommend(snapshot: catalog.CatalogSnapshot, matrix: scoring.CatalogMatrix,
+               preferences: schemas.WizardPreferences, limit: int,
+               interest_scores: Optional[Dict[int, float]]):
+    return [
+        {**snapshot.as_dict(uni), "score": round(score, 4)}
+        for uni, score in matrix.top_k(preferences, limit, interest_scores)
+    ]
+
+@router.post("/recommendations", response_model=List[schemas.Recommendation])
+async def get_recommendations(preferences: schemas.WizardPreferences, limit: int = Query(20, ge=1, le=1000),
+                              db: AsyncSession = Depends(database.get_async_db)):
+    """Top `limit` universities ranked by how well they match the preferences."""
+    snapshot, matrix = await _matrix(db)
+    interest = scoring.interest_query(preferences.academic_interest)
+    interest_scores = await db.run_sync(search_index.match_scores, interest) if interest else None
+    return responses.fast_json(_recommend(snapshot, matrix, preferences, limit, interest_scores))
+
+@router.post("/recommendations/batch", response_model=List[List[schemas.Recommendation]])
+async def get_batch_recommendations(preferences: List[schemas.WizardPreferences],
+                                    limit: int = Query(20, ge=1, le=1000),
+                                    db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Recommendations for many preference sets (e.g. a whole class) in one request.
+    Results are returned in the same order as the submitted preferences.
+    """
+    if len(preferences) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} preference sets per batch")
+    snapshot, matrix = await _matrix(db)
+    # Students often share an interest, so each distinct one is searched only once
+    interests = {scoring.interest_query(p.academic_interest) for p in preferences} - {None}
+    interest_scores = {interest: await db.run_sync(search_index.match_scores, interest) for interest in interests}
+    # Scoring a large batch is CPU-bound; keep it off the event loop
+    return await run_in_threadpool(lambda: responses.fast_json([
+        _recommend(snapshot, matrix, p, limit, interest_scores.get(scoring.interest_query(p.academic_interest)))
+        for p in preferences
+    ]))
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, List, Optional
 
 class ProgramBase(BaseModel):
     name: str
@@ -9,16 +10,14 @@ class ProgramBase(BaseModel):
 
 class Program(ProgramBase):
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FacilityBase(BaseModel):
     name: str
 
 class Facility(FacilityBase):
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UniversityBase(BaseModel):
     name: str
@@ -35,8 +34,48 @@ class University(UniversityBase):
     id: int
     programs: List[Program] = []
     facilities: List[Facility] = []
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class Recommendation(University):
+    score: float
+
+class SearchResult(BaseModel):
+    university: University
+    relevance: float
+    snippet: Optional[str] = None
+
+class ProgramCategoryRow(BaseModel):
+    category: str
+    # One list of program names per compared university, in request order
+    programs: List[List[str]]
+
+class FeeComparison(BaseModel):
+    university_id: int
+    avg_fees: Optional[int] = None
+    delta_from_lowest: Optional[int] = None
+    delta_from_first: Optional[int] = None
+
+class Comparison(BaseModel):
+    universities: List[University]
+    program_categories: List[ProgramCategoryRow]
+    fees: List[FeeComparison]
+    lowest_fees: Optional[int] = None
+
+class UniversityProjection(BaseModel):
+    """A University restricted to the fields requested with ?fields= / ?include=."""
+    id: Optional[int] = None
+    name: Optional[str] = None
+    acronym: Optional[str] = None
+    region: Optional[str] = None
+    location: Optional[str] = None
+    type: Optional[str] = None
+    avg_fees: Optional[int] = None
+    difficulty: Optional[str] = None
+    description: Optional[str] = None
+    admission_requirements: Optional[str] = None
+    programs: Optional[List[Program]] = None
+    facilities: Optional[List[Facility]] = None
+    model_config = ConfigDict(from_attributes=True)
 
 class WizardPreferences(BaseModel):
     region: Optional[str]
@@ -44,3 +83,19 @@ class WizardPreferences(BaseModel):
     max_fees: Optional[int]
     academic_interest: Optional[str]
     difficulty: Optional[str]
+
+class ScrapeJob(BaseModel):
+    id: int
+    kind: str
+    status: str
+    stage: Optional[str] = None
+    progress: float = 0
+    counts: Dict[str, int] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # True when the request joined a job that was already running
+    attached: bool = False
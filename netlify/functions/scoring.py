@@ -0,0 +1,172 @@
+"""
+Columnar scoring engine for wizard recommendations.
+
+Instead of hard SQL filters (where one slightly-off preference returns
+nothing), every university gets a weighted score in [0, 1] built from soft
+per-criterion matches. The catalog snapshot is encoded once into NumPy
+arrays, so a request is a handful of vectorised operations plus a partial
+sort for the top k. Interest relevance comes from the full-text index in
+search_index.py and is passed in as a {university id: score} mapping.
+"""
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import schemas
+
+WEIGHTS = {
+    "region": 0.25,
+    "fees": 0.25,
+    "interest": 0.2,
+    "type": 0.15,
+    "difficulty": 0.15,
+}
+DIFFICULTY_LEVELS = ['Low', 'Medium', 'High', 'Very High']
+# Broad interests offered by the wizard, expanded to the words found in program names
+INTEREST_SYNONYMS = {
+    "stem": ("science", "technology", "engineering", "math"),
+    "health sciences": ("medicine", "health", "nursing"),
+}
+# Score given when the university has no value for the criterion
+UNKNOWN_SCORE = 0.5
+
+
+def interest_query(interest: Optional[str]) -> Optional[str]:
+    """The full-text query for an academic interest, or None when it is not set."""
+    if not _is_set(interest):
+        return None
+    synonyms = INTEREST_SYNONYMS.get(interest.strip().lower())
+    return " ".join(synonyms) if synonyms else interest
+
+
+def _is_set(value) -> bool:
+    return bool(value) and value != 'Any'
+
+
+def _encode(values: Sequence) -> Tuple[Dict, np.ndarray]:
+    vocab: Dict = {}
+    codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in values), dtype=np.int32, count=len(values))
+    return vocab, codes
+
+
+class CatalogMatrix:
+    """The catalog snapshot encoded as parallel arrays, one slot per university."""
+
+    def __init__(self, universities: Sequence[schemas.University]):
+        self.universities = tuple(universities)
+        self.ids = np.array([u.id for u in self.universities], dtype=np.int64)
+        self.row_of = {uni_id: row for row, uni_id in enumerate(self.ids.tolist())}
+        self.region_vocab, self.regions = _encode([u.region for u in self.universities])
+        self.type_vocab, self.types = _encode([u.type for u in self.universities])
+        self.fees = np.array(
+            [np.nan if u.avg_fees is None else u.avg_fees for u in self.universities], dtype=np.float32
+        )
+        self.fees_known = ~np.isnan(self.fees)
+        # Unknown difficulty is stored as the extra last level so it can index lookup tables
+        self.difficulty = np.array(
+            [DIFFICULTY_LEVELS.index(u.difficulty) if u.difficulty in DIFFICULTY_LEVELS else len(DIFFICULTY_LEVELS)
+             for u in self.universities], dtype=np.intp
+        )
+        # Rank of each row among equal scores: easier admission first (unknown counts as
+        # easiest), then id, so ties can be settled inside the partition in top_k
+        tie_order = np.lexsort((self.ids, np.where(self.difficulty < len(DIFFICULTY_LEVELS), self.difficulty, 0)))
+        self.tie_rank = np.empty(len(self), dtype=np.intp)
+        self.tie_rank[tie_order] = np.arange(len(self))
+
+    def __len__(self):
+        return len(self.universities)
+
+    def _category(self, vocab: Dict, codes: np.ndarray, value: str) -> np.ndarray:
+        return codes == vocab.get(value, -1)
+
+    def _fees(self, max_fees: int) -> np.ndarray:
+        # Full marks within budget, falling linearly to 0 at twice the budget
+        score = self.fees - np.float32(max_fees)
+        score *= np.float32(-1.0 / max_fees)
+        score += np.float32(1.0)
+        np.clip(score, 0.0, 1.0, out=score)
+        score[~self.fees_known] = UNKNOWN_SCORE
+        return score
+
+    def _difficulty(self, difficulty: str) -> np.ndarray:
+        if difficulty not in DIFFICULTY_LEVELS:
+            return np.float32(UNKNOWN_SCORE)
+        wanted = DIFFICULTY_LEVELS.index(difficulty)
+        table = [1.0 - abs(level - wanted) / (len(DIFFICULTY_LEVELS) - 1) for level in range(len(DIFFICULTY_LEVELS))]
+        return np.array(table + [UNKNOWN_SCORE], dtype=np.float32)[self.difficulty]
+
+    def _interest(self, interest_scores: Dict[int, float]) -> np.ndarray:
+        scores = np.zeros(len(self), dtype=np.float32)
+        matched = [(self.row_of[i], s) for i, s in interest_scores.items() if i in self.row_of]
+        if matched:
+            rows, values = zip(*matched)
+            scores[list(rows)] = values
+        return scores
+
+    def score(self, prefs: schemas.WizardPreferences, interest_scores: Optional[Dict[int, float]] = None,
+              weights: Dict[str, float] = WEIGHTS) -> np.ndarray:
+        """
+        Weighted mean of the criteria the user actually set; 1.0 everywhere if none were.
+        ``interest_scores`` holds the full-text relevance of each university for the interest.
+        """
+        parts = []
+        if _is_set(prefs.region):
+            parts.append((weights["region"], self._category(self.region_vocab, self.regions, prefs.region)))
+        if _is_set(prefs.type):
+            parts.append((weights["type"], self._category(self.type_vocab, self.types, prefs.type)))
+        if prefs.max_fees:
+            parts.append((weights["fees"], self._fees(prefs.max_fees)))
+        if _is_set(prefs.difficulty):
+            parts.append((weights["difficulty"], self._difficulty(prefs.difficulty)))
+        if _is_set(prefs.academic_interest):
+            parts.append((weights["interest"], self._interest(interest_scores or {})))
+
+        total = np.ones(len(self), dtype=np.float32)
+        if not parts:
+            return total
+        total[:] = 0.0
+        norm = sum(weight for weight, _ in parts)
+        for weight, values in parts:
+            total += np.float32(weight / norm) * values
+        return total
+
+    def top_k(self, prefs: schemas.WizardPreferences, k: int = 20,
+              interest_scores: Optional[Dict[int, float]] = None,
+              min_score: float = 0.0) -> List[Tuple[schemas.University, float]]:
+        scores = self.score(prefs, interest_scores)
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        # Partition in O(n) to find the k-th best score. Rows above it are all kept; of the
+        # rows tied with it, a second partition on tie_rank keeps only the ones needed, so
+        # just k rows are sorted even when most scores are equal (e.g. no preferences).
+        if k < len(self):
+            threshold = np.partition(scores, len(self) - k)[len(self) - k]
+            above = np.flatnonzero(scores > threshold)
+            tied = np.flatnonzero(scores == threshold)
+            needed = k - len(above)
+            if needed < len(tied):
+                tied = tied[np.argpartition(self.tie_rank[tied], needed - 1)[:needed]]
+            candidates = np.concatenate((above, tied))
+        else:
+            candidates = np.arange(len(self))
+        # Best score first, then the tie rank (easier admission, then id)
+        order = np.lexsort((self.tie_rank[candidates], -scores[candidates]))
+        return [
+            (self.universities[i], float(scores[i]))
+            for i in candidates[order] if scores[i] > min_score
+        ]
+
+
+_lock = threading.Lock()
+_matrix: Optional[Tuple[object, CatalogMatrix]] = None
+
+
+def get_matrix(snapshot) -> CatalogMatrix:
+    """The matrix for a catalog snapshot, built once per snapshot."""
+    global _matrix
+    with _lock:
+        if _matrix is None or _matrix[0] is not snapshot:
+            _matrix = (snapshot, CatalogMatrix(snapshot.universities))
+        return _matrix[1]
@@ -0,0 +1,25 @@
+"""
+Netlify background function for scrape and refresh jobs.
+
+The "-background" suffix makes Netlify answer the invocation with 202 straight
+away and let the function run for up to 15 minutes, past the API function's
+timeout. jobs.start posts {"job_id": N} here for a job it has just queued;
+the job is claimed before it runs, so a repeated invocation does nothing.
+"""
+import base64
+import json
+
+import jobs
+from routes import scrape
+
+
+def handler(event, context):
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    try:
+        job_id = int(json.loads(body)["job_id"])
+    except (KeyError, TypeError, ValueError):
+        return {"statusCode": 400, "body": "Expected a JSON body with a job_id"}
+    jobs.run_queued(job_id, scrape.JOB_RUNNERS)
+    return {"statusCode": 202}
@@ -0,0 +1,157 @@
+"""
+Full-text index over university names, places, descriptions, programs and prospects.
+
+SQLite uses an FTS5 virtual table; Postgres uses a table with a generated,
+weighted ``tsvector`` column and a GIN index. Both live in the
+``university_search`` table (one row per university, keyed by its id) and are
+kept current by the scraper. Queries are reduced to plain word prefixes, so
+user input never reaches the MATCH / tsquery syntax.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import crud, models
+
+# Column weights for bm25 (SQLite) mirror the A/B/C/D tsvector weights (Postgres)
+SQLITE_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS university_search USING fts5(
+    name, acronym, place, programs, prospects, description,
+    tokenize = 'porter unicode61'
+)
+"""
+SQLITE_WEIGHTS = "10.0, 10.0, 2.0, 5.0, 2.0, 1.0"
+
+POSTGRES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS university_search (
+        university_id INTEGER PRIMARY KEY REFERENCES universities(id) ON DELETE CASCADE,
+        name TEXT, acronym TEXT, place TEXT, programs TEXT, prospects TEXT, description TEXT,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '') || ' ' || coalesce(acronym, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(programs, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(place, '') || ' ' || coalesce(prospects, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'D')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_university_search_document ON university_search USING GIN (document)",
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _is_postgres(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def terms(query: Optional[str]) -> List[str]:
+    return [w.lower() for w in _WORD.findall(query or "")]
+
+
+def ensure_index(engine):
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+        else:
+            conn.execute(text(SQLITE_DDL))
+
+
+def _document(uni: models.University, programs) -> dict:
+    return {
+        "id": uni.id,
+        "name": uni.name,
+        "acronym": uni.acronym,
+        "place": " ".join(dict.fromkeys(p for p in (uni.location, uni.region) if p)),
+        "programs": "; ".join(p.name or "" for p in programs),
+        "prospects": "; ".join(p.prospects or "" for p in programs),
+        "description": uni.description,
+    }
+
+
+def index_universities(db: Session, entries) -> None:
+    """Add or replace the index rows for (university, its programs) pairs."""
+    rows = [_document(uni, programs) for uni, programs in entries]
+    if not rows:
+        return
+    if _is_postgres(db):
+        db.execute(text(
+            "INSERT INTO university_search (university_id, name, acronym, place, programs, prospects, description) "
+            "VALUES (:id, :name, :acronym, :place, :programs, :prospects, :description) "
+            "ON CONFLICT (university_id) DO UPDATE SET name = excluded.name, acronym = excluded.acronym, "
+            "place = excluded.place, programs = excluded.programs, prospects = excluded.prospects, description = excluded.description"
+        ), rows)
+    else:
+        db.execute(text(
+            "INSERT OR REPLACE INTO university_search (rowid, name, acronym, place, programs, prospects, description) "
+            "VALUES (:id, :name, :acronym, :place, :programs, :prospects, :description)"
+        ), rows)
+
+
+def remove_universities(db: Session, ids) -> None:
+    ids = list(ids)
+    if ids:
+        key = "university_id" if _is_postgres(db) else "rowid"
+        db.execute(text(f"DELETE FROM university_search WHERE {key} = :id"), [{"id": i} for i in ids])
+
+
+def clear(db: Session) -> None:
+    db.execute(text("DELETE FROM university_search"))
+
+
+def rebuild(db: Session) -> int:
+    """Re-index the whole catalog. The caller commits."""
+    clear(db)
+    universities = crud.with_relations(db.query(models.University), ("programs",)).all()
+    index_universities(db, ((u, u.programs) for u in universities))
+    return len(universities)
+
+
+def search_statement(dialect: str, query: str, limit: int = 20, match_any: bool = False):
+    """The statement search() runs on ``dialect``, with its parameters bound; None without search terms."""
+    words = terms(query)
+    if not words:
+        return None
+    if dialect == "postgresql":
+        tsquery = (" | " if match_any else " & ").join(f"{w}:*" for w in words)
+        return text(
+            "SELECT university_id, ts_rank(document, q) AS relevance, "
+            "ts_headline('english', coalesce(programs, '') || ' ' || coalesce(description, ''), q, "
+            "'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=18, MinWords=6') "
+            "FROM university_search, to_tsquery('english', :q) q "
+            "WHERE document @@ q ORDER BY relevance DESC, university_id LIMIT :limit"
+        ).bindparams(q=tsquery, limit=limit)
+    match = (" OR " if match_any else " ").join(f'"{w}"*' for w in words)
+    # bm25() is lower-is-better, so negate it into a relevance
+    return text(
+        f"SELECT rowid, -bm25(university_search, {SQLITE_WEIGHTS}) AS relevance, "
+        "snippet(university_search, -1, '<mark>', '</mark>', '…', 12) "
+        "FROM university_search WHERE university_search MATCH :q "
+        "ORDER BY relevance DESC, rowid LIMIT :limit"
+    ).bindparams(q=match, limit=limit)
+
+
+def search(db: Session, query: str, limit: int = 20,
+           match_any: bool = False) -> List[Tuple[int, float, str]]:
+    """
+    Return (university id, relevance, snippet) for the best matches, best first.
+    Every word must match unless ``match_any``; each word also matches as a prefix.
+    Relevance is positive and only comparable within one result set.
+    """
+    statement = search_statement(db.get_bind().dialect.name, query, limit, match_any)
+    if statement is None:
+        return []
+    rows = db.execute(statement)
+    return [(uni_id, float(relevance), snippet) for uni_id, relevance, snippet in rows]
+
+
+def match_scores(db: Session, query: str, limit: int = 10_000) -> Dict[int, float]:
+    """Relevance of every university matching any word of ``query``, scaled to (0, 1]."""
+    results = search(db, query, limit=limit, match_any=True)
+    if not results:
+        return {}
+    best = max(relevance for _, relevance, _ in results) or 1.0
+    return {uni_id: max(relevance / best, 1e-6) for uni_id, relevance, _ in results}
@@ -0,0 +1,93 @@
+"""
+Static copies of the read-only catalog payloads, published with the site.
+
+The catalog only changes when the scraper runs, so the Netlify build renders
+what the list, detail and insights endpoints would return into JSON files
+under ``frontend/dist/data``. The CDN then serves them without invoking the
+function or touching the database:
+
+    data/manifest.json                         version and path of the current files (revalidated)
+    data/catalog/<version>-<digest>/universities.json
+    data/catalog/<version>-<digest>/universities/<id>.json
+    data/catalog/<version>-<digest>/insights/{summary,regions,types,difficulty}.json
+
+Files under ``catalog/`` never change once written (a new catalog gets a new
+directory), so they are cached as immutable. The frontend reads the manifest
+first and falls back to the live API when it or a file is missing; queries
+such as wizard recommendations, search and comparisons always use the API.
+
+When STATIC_REBUILD_HOOK is set to a Netlify build hook URL, a scrape that
+changes the catalog triggers a new build so the published copy catches up.
+"""
+import hashlib
+import os
+import shutil
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+import catalog, insights_store, responses, schemas
+
+REBUILD_HOOK = os.getenv("STATIC_REBUILD_HOOK")
+INSIGHT_BREAKDOWNS = ("regions", "types", "difficulty")
+LIST_KEYS = tuple(schemas.UniversityProjection.model_fields)
+
+
+def render(db: Session) -> dict:
+    """{relative path: JSON bytes} for the current catalog, matching the API responses."""
+    snapshot = catalog.load_snapshot(db, catalog.get_version(db))
+    rows = [snapshot.as_dict(uni) for uni in snapshot.universities]
+    summary = insights_store.get_summary(db)
+
+    files = {"universities.json": responses.dumps([{key: row[key] for key in LIST_KEYS} for row in rows])}
+    for row in rows:
+        files[f"universities/{row['id']}.json"] = responses.dumps(row)
+    files["insights/summary.json"] = responses.dumps(summary)
+    for name in INSIGHT_BREAKDOWNS:
+        files[f"insights/{name}.json"] = responses.dumps(summary[name])
+    return {"version": snapshot.version, "universities": len(rows), "files": files}
+
+
+def _digest(files: dict) -> str:
+    sha = hashlib.sha256()
+    for path in sorted(files):
+        sha.update(path.encode() + b"\0" + files[path] + b"\0")
+    return sha.hexdigest()[:12]
+
+
+def export(db: Session, out_dir: str) -> dict:
+    """Write the files and manifest into ``out_dir``, replacing any earlier export. Returns the manifest."""
+    rendered = render(db)
+    files = rendered["files"]
+    path = f"catalog/{rendered['version']}-{_digest(files)}"
+
+    shutil.rmtree(os.path.join(out_dir, "catalog"), ignore_errors=True)
+    for name, body in files.items():
+        target = os.path.join(out_dir, path, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(body)
+
+    manifest = {
+        "version": rendered["version"],
+        "path": path,
+        "universities": rendered["universities"],
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    # Written last, so a partial export is never advertised
+    with open(os.path.join(out_dir, "manifest.json"), "wb") as f:
+        f.write(responses.dumps(manifest))
+    return manifest
+
+
+def request_rebuild() -> None:
+    """Ask Netlify to rebuild the site (and so re-export) after the catalog changed."""
+    if not REBUILD_HOOK:
+        return
+    import httpx
+
+    try:
+        httpx.post(REBUILD_HOOK, timeout=10).raise_for_status()
+        print("Requested a site rebuild for the updated catalog")
+    except httpx.HTTPError as e:
+        print(f"Could not request a site rebuild: {e}")
@@ -0,0 +1,228 @@
+"""
+Parser for the TCU "University Institutions Approved to operate in Tanzania" PDF.
+
+Pages are extracted one at a time, by a small process pool when one is
+available, and fed in order through a line-based state machine that yields
+institution records as soon as their row is complete. Only a bounded window
+of pages is in flight, so memory does not grow with the size of the list.
+The official list only gives the name, acronym, head office and status;
+routes.scrape enriches the records with the curated programs and fees.
+"""
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, Optional
+
+from pypdf import PdfReader
+
+BUNDLED_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "universities_list.pdf")
+WORKERS = int(os.getenv("TCU_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages queued per worker; bounds how many extracted pages sit in memory
+PAGES_PER_WORKER = 2
+
+STATUSES = (
+    "Certificate of Full Registration and Chartered",
+    "Certificate of Full Registration",
+    "Accredited and Chartered",
+    "Accredited",
+    "Provisional Licence",
+    "As per status of the Mother University",
+)
+REGIONS = (
+    "Arusha", "Dar es Salaam", "Dodoma", "Geita", "Iringa", "Kagera", "Katavi", "Kigoma",
+    "Kilimanjaro", "Lindi", "Manyara", "Mara", "Mbeya", "Morogoro", "Mtwara", "Mwanza",
+    "Njombe", "Pwani", "Rukwa", "Ruvuma", "Shinyanga", "Simiyu", "Singida", "Songwe",
+    "Tabora", "Tanga", "Zanzibar",
+)
+# Head offices that are towns rather than regions
+TOWN_REGIONS = {
+    "Bagamoyo": "Pwani",
+    "Makumira": "Arusha",
+    "Moshi": "Kilimanjaro",
+    "Musoma": "Mara",
+    "Mzumbe": "Morogoro",
+    "Same": "Kilimanjaro",
+    "Usa River": "Arusha",
+}
+# Misspellings found in published editions of the list
+PLACE_ALIASES = {"Dar es Saaam": "Dar es Salaam"}
+
+_STATUS_RE = re.compile(r"\s+(%s)\s*$" % "|".join(map(re.escape, STATUSES)), re.IGNORECASE)
+_AFFILIATION_RE = re.compile(r"\s+((?:University|Campus)\s+(?:College|Institute|Centre)\s+under\s+\S+)$", re.IGNORECASE)
+_PLACE_RE = re.compile(r"\s+(?:(%s),\s+)?(%s)$" % (
+    "|".join(map(re.escape, TOWN_REGIONS)),
+    "|".join(map(re.escape, sorted((*REGIONS, *TOWN_REGIONS, *PLACE_ALIASES), key=len, reverse=True))),
+))
+_ACRONYM_RE = re.compile(r"\s*\(([^()]+)\)(?:\s*,\s*formerly\s+\S+)?\s*$")
+_ROW_RE = re.compile(r"^(\d+)\.(?:\s+(.*))?$")
+_SECTION_RE = re.compile(r"^\d\.(\d)\s+(.+)$")
+# Running headers, page numbers and table headings repeated on every page
+_CHROME_RE = re.compile(r"^(\d+|Universities for Prosperity.*|SN Name of the .*)$")
+
+_reader: Optional[PdfReader] = None
+
+
+def _category(title: str) -> str:
+    title = title.lower()
+    if "college" in title:
+        return "university college"
+    if "campus" in title or "centre" in title:
+        return "university campus or centre"
+    return "university"
+
+
+def _open(path: str) -> None:
+    global _reader
+    _reader = PdfReader(path)
+
+
+def _extract(reader: PdfReader, index: int) -> str:
+    text = reader.pages[index].extract_text() or ""
+    # Drop parsed objects so a long document is not held in memory page after page
+    reader.resolved_objects.clear()
+    return text
+
+
+def _page_text(index: int) -> str:
+    return _extract(_reader, index)
+
+
+def _pooled(path: str, indices: range, workers: int) -> Iterator[str]:
+    with ProcessPoolExecutor(workers, initializer=_open, initargs=(path,)) as pool:
+        pending = deque()
+        for index in indices:
+            pending.append(pool.submit(_page_text, index))
+            if len(pending) >= workers * PAGES_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def page_texts(path: str, workers: int = WORKERS) -> Iterator[str]:
+    """The text of every page, in order."""
+    reader = PdfReader(path)
+    count = len(reader.pages)
+    done = 0
+    # A short document is not worth starting worker processes for
+    if workers > 1 and count > workers * PAGES_PER_WORKER:
+        try:
+            for text in _pooled(path, range(count), workers):
+                yield text
+                done += 1
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            # Serverless runtimes often lack the shared memory a process pool needs
+            print(f"TCU PDF process pool unavailable ({e}); parsing remaining pages serially")
+    for index in range(done, count):
+        yield _extract(reader, index)
+
+
+def _place(location: str):
+    location = PLACE_ALIASES.get(location, location)
+    return TOWN_REGIONS.get(location, location), location
+
+
+def parse_row(text: str, institution_type: Optional[str] = None, category: Optional[str] = None) -> Optional[dict]:
+    """Turn one table row (SN already removed) into a record, or None if it does not parse."""
+    text = " ".join(text.split())
+    status = _STATUS_RE.search(text)
+    if not status:
+        return None
+    text = text[:status.start()]
+
+    place = _PLACE_RE.search(text)
+    if not place:
+        return None
+    town, region = place.groups()
+    region, location = _place(region)
+    if town:
+        location = town
+    text = text[:place.start()]
+    affiliation = _AFFILIATION_RE.search(text)
+    if affiliation:
+        text = text[:affiliation.start()]
+
+    acronym = _ACRONYM_RE.search(text)
+    name = text[:acronym.start()] if acronym else text
+    name = name.strip(" ,")
+    if not name:
+        return None
+    return {
+        "name": name,
+        "acronym": acronym.group(1).strip() if acronym else None,
+        "region": region,
+        "location": location,
+        "type": institution_type,
+        "category": category,
+        "affiliation": affiliation.group(1) if affiliation else None,
+        "status": next(s for s in STATUSES if s.lower() == status.group(1).lower()),
+    }
+
+
+def parse_pages(pages: Iterable[str]) -> Iterator[dict]:
+    """Yield institution records from page texts, as soon as each row is complete."""
+    category = institution_type = None
+    row = None
+    serial = 0
+
+    def finish():
+        if row is not None:
+            record = parse_row(row, institution_type, category)
+            if record is None:
+                print(f"Could not parse TCU list row: {row!r}")
+            return record
+
+    for page in pages:
+        for line in page.splitlines():
+            line = line.strip()
+            if _CHROME_RE.match(line):
+                continue
+            section = _SECTION_RE.match(line)
+            new_row = _ROW_RE.match(line)
+            # Rows are numbered from 1 in every table; anything else is prose
+            if new_row and int(new_row.group(1)) not in (1, serial + 1):
+                new_row = None
+            if section or new_row or not line:
+                record = finish()
+                if record:
+                    yield record
+                row = None
+            if section:
+                number, title = section.groups()
+                if number == "0":
+                    category = _category(title)
+                else:
+                    institution_type = "Public" if title.lower().startswith("public") else "Private"
+            elif new_row:
+                serial = int(new_row.group(1))
+                row = new_row.group(2) or ""
+            elif line and row is not None:
+                row += " " + line
+    record = finish()
+    if record:
+        yield record
+
+
+def parse(path: str = BUNDLED_PDF, workers: int = WORKERS) -> Iterator[dict]:
+    return parse_pages(page_texts(path, workers))
+
+
+def parse_bytes(content: bytes, workers: int = WORKERS) -> Iterator[dict]:
+    """parse() for a downloaded document; workers read it from a temporary file."""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        yield from parse(path, workers)
+    finally:
+        os.remove(path)
+
+
+def describe(record: dict) -> str:
+    """A short description for institutions without curated details."""
+    description = f"{record.get('type') or ''} {record.get('category') or 'university'}".strip().capitalize()
+    if record.get("affiliation"):
+        description += " under " + record["affiliation"].split(" under ")[-1]
+    return f"{description}. TCU status: {record['status']}."
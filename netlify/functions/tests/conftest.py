@@ -0,0 +1,28 @@
+"""
+The tests import the function modules the way api.py does, from
+netlify/functions, against a throwaway SQLite file: NETLIFY_DATABASE_URL is
+set here, before database.py creates its engines.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FUNCTIONS_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="catalog-tests-")
+os.environ["NETLIFY_DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'catalog.sqlite')}"
+os.environ["REQUEST_LOG"] = "off"
+
+
+@pytest.fixture(scope="session")
+def catalog_db():
+    """A small synthetic catalog at NETLIFY_DATABASE_URL; returns the number of universities."""
+    import database
+    from benchmarks import synthetic
+
+    report, _, _ = synthetic.create_database(database.engine.url.database, programs=120)
+    database.engine.dispose()
+    return report.added
@@ -0,0 +1,100 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+
+LAST_MODIFIED = "Sat, 18 Oct 2026 08:00:00 GMT"
+
+
+class Source(BaseHTTPRequestHandler):
+    """/etag and /modified answer 304 to a matching validator; /slow/<n> takes a moment."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path.startswith("/slow/"):
+                time.sleep(0.1)
+                self._send(200, {}, self.path.encode())
+            elif self.path == "/etag":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self._send(304, {"ETag": '"v1"'})
+                else:
+                    self._send(200, {"ETag": '"v1"'}, b"etag body")
+            elif self.path == "/modified":
+                if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                    self._send(304, {})
+                else:
+                    self._send(200, {"Last-Modified": LAST_MODIFIED}, b"modified body")
+            else:
+                self._send(404, {})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, headers, body=b""):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """A stand-in source on a free local port; ``server.url(path)`` builds its URLs."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Source)
+    httpd.lock, httpd.requests, httpd.in_flight, httpd.max_in_flight = threading.Lock(), [], 0, 0
+    httpd.url = lambda path: f"http://127.0.0.1:{httpd.server_address[1]}{path}"
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return fetcher.DiskCache(str(tmp_path))
+
+
+def test_requests_per_host_are_capped(server, cache):
+    urls = [server.url(f"/slow/{i}") for i in range(6)]
+    results = fetcher.fetch_all_sync(urls, cache, per_host=2)
+    assert [results[url].text for url in urls] == [f"/slow/{i}" for i in range(6)]
+    assert server.max_in_flight == 2
+
+
+@pytest.mark.parametrize("path, header", [("/etag", "If-None-Match"), ("/modified", "If-Modified-Since")])
+def test_unchanged_source_is_revalidated(server, cache, path, header):
+    first = fetcher.fetch_all_sync([server.url(path)], cache)[server.url(path)]
+    assert first.status == 200 and not first.from_cache
+
+    second = fetcher.fetch_all_sync([server.url(path)], cache)[server.url(path)]
+    assert second.status == 304 and second.from_cache
+    assert second.content == first.content
+    assert header not in server.requests[0][1] and header in server.requests[1][1]
+
+
+def test_cached_copy_is_served_when_the_source_is_down(server, cache):
+    url = server.url("/etag")
+    fetcher.fetch_all_sync([url], cache)
+    server.shutdown()
+    server.server_close()
+
+    result = fetcher.fetch_all_sync([url], cache, timeout=2)[url]
+    assert result.ok and result.from_cache
+    assert result.content == b"etag body"
+    assert result.error and "ConnectError" in result.error
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import database, insights_store, search_index
+from routes import scrape
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'insights.sqlite'}")
+    database.Base.metadata.create_all(bind=engine)
+    search_index.ensure_index(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_added_universities_reach_the_stored_insights(db):
+    scrape.add_university(db, {"name": "University of Dodoma", "region": "Dodoma", "avg_fees": 1_000_000,
+                               "programs": [{"name": "Law"}]})
+    assert insights_store.get_summary(db)["total"] == 1
+
+    scrape.add_university(db, {"name": "Mzumbe University", "region": "Morogoro", "avg_fees": 3_000_000})
+    summary = insights_store.get_summary(db)
+    assert summary == insights_store.rebuild(db)
+    assert summary["total"] == 2
+    assert summary["regions"] == {"Dodoma": 1, "Morogoro": 1}
+    assert summary["fees"]["max"] == 3_000_000
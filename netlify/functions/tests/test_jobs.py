@@ -0,0 +1,97 @@
+import importlib.util
+import os
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import database, jobs, main
+from routes import scrape
+
+spec = importlib.util.spec_from_file_location(
+    "scrape_background", os.path.join(os.path.dirname(jobs.__file__), "scrape-background.py"))
+scrape_background = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(scrape_background)
+
+
+@pytest.fixture
+def runs(catalog_db, monkeypatch):
+    """Replaces the scrape job with one that records its calls and reports progress."""
+    calls = []
+
+    def run(db, progress):
+        calls.append(db)
+        progress("saving", 0.5, added=1)
+        return {"message": "done", "changes": {"added": 1}}
+
+    monkeypatch.setitem(scrape.JOB_RUNNERS, "scrape", run)
+    return calls
+
+
+def _get(job_id):
+    db = database.SessionLocal()
+    try:
+        return jobs.get(db, job_id)
+    finally:
+        db.close()
+
+
+def test_inline_job_runs_in_the_request(runs, monkeypatch):
+    monkeypatch.setattr(jobs, "BACKGROUND", False)
+    monkeypatch.setattr(jobs, "WORKERS", 0)
+    response = TestClient(main.app).post("/scrape/")
+    assert response.status_code == 202
+    assert response.json()["status"] == "succeeded" and response.json()["counts"] == {"added": 1}
+    assert len(runs) == 1
+
+
+def test_background_job_is_dispatched_and_claimed_once(runs, monkeypatch):
+    posted = []
+    monkeypatch.setattr(jobs, "BACKGROUND", True)
+    monkeypatch.setattr(httpx, "post", lambda url, **kwargs: posted.append((url, kwargs["json"]))
+                        or httpx.Response(202, request=httpx.Request("POST", url)))
+
+    job = jobs.start("scrape", scrape.JOB_RUNNERS["scrape"], "https://example.netlify.app")
+    assert job.status == "queued" and not runs
+    assert posted == [("https://example.netlify.app/.netlify/functions/scrape-background", {"job_id": job.id})]
+
+    event = {"body": f'{{"job_id": {job.id}}}'}
+    assert scrape_background.handler(event, None)["statusCode"] == 202
+    assert _get(job.id).status == "succeeded"
+    # A repeated invocation finds the job already claimed
+    scrape_background.handler(event, None)
+    assert len(runs) == 1
+
+
+def test_unreachable_background_function_fails_the_job(runs, monkeypatch):
+    def refuse(url, **kwargs):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(jobs, "BACKGROUND", True)
+    monkeypatch.setattr(httpx, "post", refuse)
+    job = jobs.start("scrape", scrape.JOB_RUNNERS["scrape"], "https://example.netlify.app")
+    assert job.status == "failed" and not runs
+    # The catalog is free again for the next job
+    monkeypatch.setattr(jobs, "BACKGROUND", False)
+    monkeypatch.setattr(jobs, "WORKERS", 0)
+    assert jobs.start("scrape", scrape.JOB_RUNNERS["scrape"]).status == "succeeded"
+
+
+def test_job_progress_with_the_serverless_pool(runs, monkeypatch):
+    # The job's session holds the container's one pooled connection while progress is written
+    engine = database.make_engine(database.DATABASE_URL, profile="serverless")
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(jobs, "BACKGROUND", False)
+    monkeypatch.setattr(jobs, "WORKERS", 0)
+
+    def run(db, progress):
+        db.execute(text("SELECT 1"))
+        progress("saving", 0.6)
+        return {"message": "done", "changes": {}}
+
+    try:
+        assert jobs.start("scrape", run).status == "succeeded"
+    finally:
+        engine.dispose()
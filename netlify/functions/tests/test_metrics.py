@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import instrumentation, main
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_metrics_are_open_locally_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", None)
+    monkeypatch.setattr(instrumentation, "METRICS_REQUIRE_TOKEN", False)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+def test_metrics_are_not_served_on_lambda_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", None)
+    monkeypatch.setattr(instrumentation, "METRICS_REQUIRE_TOKEN", True)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "s3cret")
+    monkeypatch.setattr(instrumentation, "METRICS_REQUIRE_TOKEN", True)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_only_the_metrics_path_skips_timing(client, catalog_db):
+    assert "server-timing" not in client.get("/metrics").headers
+    # Another path ending in /metrics is an ordinary request
+    assert "server-timing" in client.get("/universities/metrics").headers
@@ -0,0 +1,37 @@
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+import database, manage
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """An empty SQLite database for the migrations (env.py uses database.engine)."""
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def test_duplicate_names_stop_the_upgrade_with_the_rows(engine):
+    config = Config(manage.ALEMBIC_INI)
+    command.upgrade(config, "0001")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO universities (id, name) VALUES "
+                          "(1, 'University of Dodoma'), (2, 'Mzumbe University'), (3, 'Univ. of Dodoma')"))
+
+    with pytest.raises(RuntimeError) as error:
+        command.upgrade(config, "head")
+    message = str(error.value)
+    assert "1 'University of Dodoma'" in message and "3 'Univ. of Dodoma'" in message
+    assert "Mzumbe" not in message
+
+    # Once the duplicate is gone the same database upgrades
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM universities WHERE id = 3"))
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        keys = conn.execute(text("SELECT normalized_name FROM universities ORDER BY id")).scalars().all()
+    assert keys == ["university dodoma", "mzumbe university"]
@@ -0,0 +1,20 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(catalog_db):
+    return TestClient(main.app)
+
+
+def test_search_is_limited(client):
+    response = client.get("/search/", params={"q": "university", "limit": 3})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+@pytest.mark.parametrize("limit", [0, -1, 101])
+def test_search_rejects_out_of_range_limit(client, limit):
+    assert client.get("/search/", params={"q": "university", "limit": limit}).status_code == 422
@@ -0,0 +1,136 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import catalog, database, main
+
+PAGE = 10
+
+
+@pytest.fixture
+def client(catalog_db, monkeypatch):
+    # CATALOG_CACHE=off: every page is read from the database
+    monkeypatch.setattr(catalog, "CACHE_ENABLED", False)
+    return TestClient(main.app)
+
+
+@pytest.fixture(params=[False, True], ids=["database", "snapshot"])
+def any_client(catalog_db, monkeypatch, request):
+    """A client for each read path: the database, and the in-memory catalog snapshot."""
+    monkeypatch.setattr(catalog, "CACHE_ENABLED", request.param)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def statements():
+    """SQL run by the async routes, minus the catalog version check behind the ETag."""
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        if "catalog_meta" not in statement:
+            executed.append(statement)
+
+    engine = database.async_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _pages(client, statements, query):
+    """Walk every page of /universities/ with ``query``; yields (rows, statements) per page."""
+    cursor = None
+    while True:
+        statements.clear()
+        params = {**query, "limit": PAGE, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/universities/", params=params)
+        assert response.status_code == 200, response.text
+        yield response.json(), list(statements)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return
+
+
+def test_page_with_collections_is_three_queries(client, statements, catalog_db):
+    seen = 0
+    for rows, executed in _pages(client, statements, {}):
+        assert len(executed) == 3, executed
+        assert all("programs" in row and "facilities" in row for row in rows)
+        seen += len(rows)
+    assert seen == catalog_db
+
+
+def test_page_of_columns_is_one_query(client, statements, catalog_db):
+    seen = 0
+    for rows, executed in _pages(client, statements, {"fields": "name"}):
+        assert len(executed) == 1, executed
+        assert all(set(row) == {"id", "name"} for row in rows)
+        seen += len(rows)
+    assert seen == catalog_db
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+def test_limit_out_of_range_is_rejected(client, limit):
+    assert client.get("/universities/", params={"limit": limit}).status_code == 422
+
+
+@pytest.mark.parametrize("sort", ["name", "avg_fees", "-avg_fees"])
+def test_keyset_pages_cover_the_catalog_once(client, statements, catalog_db, sort):
+    ids = [row["id"] for rows, _ in _pages(client, statements, {"sort": sort, "fields": "id"}) for row in rows]
+    assert len(ids) == len(set(ids)) == catalog_db
+
+
+def test_cursor_from_another_sort_is_rejected(any_client):
+    cursor = any_client.get("/universities/", params={"sort": "-avg_fees", "limit": 5}).headers["X-Next-Cursor"]
+    for sort in ("name", "avg_fees"):
+        response = any_client.get("/universities/", params={"sort": sort, "cursor": cursor})
+        assert response.status_code == 400, response.text
+    assert any_client.get("/universities/", params={"sort": "-avg_fees", "cursor": cursor}).status_code == 200
+
+
+@pytest.mark.parametrize("interest", ["%", "_", "computer science", "COMPUTER"])
+def test_interest_filter_agrees_on_both_paths(catalog_db, monkeypatch, interest):
+    totals = []
+    for cache in (False, True):
+        monkeypatch.setattr(catalog, "CACHE_ENABLED", cache)
+        response = TestClient(main.app).get("/universities/", params={"academic_interest": interest, "count": True})
+        totals.append(int(response.headers["X-Total-Count"]))
+    assert totals[0] == totals[1]
+    assert (totals[0] == 0) == (interest in ("%", "_"))
+
+
+def _cursor(*parts):
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("name", _cursor("name", 5, 3)),
+    ("name", _cursor("name", [1], 3)),
+    ("avg_fees", _cursor("avg_fees", "abc", 3)),
+    ("-avg_fees", _cursor("-avg_fees", True, 3)),
+    ("id", _cursor("id", None, 3)),
+    ("id", _cursor("id", 2.5, 3)),
+    ("name", _cursor("name", "M", "3")),
+    ("name", _cursor("name", "M", None)),
+    ("name", _cursor("name", "M")),
+    ("name", "not-base64!"),
+])
+def test_malformed_cursor_is_rejected(any_client, sort, cursor):
+    response = any_client.get("/universities/", params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400, response.text
+
+
+@pytest.mark.parametrize("cursor, status", [
+    (_cursor("avg_fees", None, 0), 200),    # missing fees page as 0
+    (_cursor("avg_fees", "abc", 3), 400),
+])
+def test_both_paths_agree_on_a_cursor(catalog_db, monkeypatch, cursor, status):
+    responses = []
+    for cache in (False, True):
+        monkeypatch.setattr(catalog, "CACHE_ENABLED", cache)
+        responses.append(TestClient(main.app).get(
+            "/universities/", params={"sort": "avg_fees", "cursor": cursor, "fields": "id"}))
+    assert [r.status_code for r in responses] == [status, status]
+    assert responses[0].json() == responses[1].json()
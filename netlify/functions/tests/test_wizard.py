@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+PREFERENCES = {"region": None, "type": None, "max_fees": None, "academic_interest": None, "difficulty": None}
+
+
+@pytest.fixture
+def client(catalog_db):
+    return TestClient(main.app)
+
+
+def test_recommendations_are_limited(client):
+    response = client.post("/wizard/recommendations", params={"limit": 5}, json=PREFERENCES)
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+def test_recommendations_reject_out_of_range_limit(client, limit):
+    response = client.post("/wizard/recommendations", params={"limit": limit}, json=PREFERENCES)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+def test_batch_recommendations_reject_out_of_range_limit(client, limit):
+    response = client.post("/wizard/recommendations/batch", params={"limit": limit}, json=[PREFERENCES])
+    assert response.status_code == 422
+
+
+@pytest.fixture
+def matrix(catalog_db):
+    import catalog, database, scoring
+
+    with database.SessionLocal() as db:
+        snapshot = catalog.load_snapshot(db, catalog.get_version(db))
+    return scoring.CatalogMatrix(snapshot.universities)
+
+
+@pytest.mark.parametrize("region", [None, "Dar es Salaam"], ids=["all tied", "some tied"])
+def test_top_k_matches_a_full_sort(matrix, region):
+    import schemas, scoring
+
+    prefs = schemas.WizardPreferences(**{**PREFERENCES, "region": region})
+    scores = matrix.score(prefs, None)
+
+    def rank(row):
+        difficulty = matrix.difficulty[row]
+        difficulty = difficulty if difficulty < len(scoring.DIFFICULTY_LEVELS) else 0
+        return -scores[row], difficulty, matrix.ids[row]
+
+    expected = [matrix.universities[row].id for row in sorted(range(len(matrix)), key=rank)[:15]]
+    assert [uni.id for uni, _ in matrix.top_k(prefs, 15, min_score=-1)] == expected
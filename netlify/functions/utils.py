@@ -0,0 +1,8 @@
+from typing import Iterable, Optional, Tuple
+
+
+def parse_csv(value: Optional[str], default: Iterable[str] = ()) -> Tuple[str, ...]:
+    """Split a comma separated query parameter such as ``?include=programs,facilities``."""
+    if value is None:
+        return tuple(default)
+    return tuple(part.strip() for part in value.split(",") if part.strip())